@@ -0,0 +1,5 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Benchmarks for liferay_inbound_checker."""
@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Compare the thread pool backend to the async backend against a local fake
+ClearlyDefined server. Run from the root of the repository::
+
+    python -m benchmarks.bench_backends --dependencies 1000 --latency 0.05
+"""
+
+import json
+import time
+from multiprocessing.pool import ThreadPool
+
+import click
+
+from liferay_inbound_checker.aio import check_concurrently
+from liferay_inbound_checker.check import check
+from liferay_inbound_checker.clearlydefined import ClearlyDefinedClient
+from liferay_inbound_checker.dependencies import Dependency
+from tests.fakeserver import FakeClearlyDefinedServer
+
+DEFINITIONS = {
+    "described": {"hashes": {"sha1": "0" * 40}},
+    "licensed": {
+        "declared": "Apache-2.0",
+        "facets": {"core": {"discovered": {"expressions": ["MIT"]}}},
+    },
+    "scores": {"effective": 90},
+}
+
+
+def run_thread(dependencies, url, workers):
+    with ClearlyDefinedClient(pool_size=workers, base_url=url) as client:
+        with ThreadPool(workers) as pool:
+            return pool.starmap(
+                check,
+                (
+                    (dependency, None, None, client)
+                    for dependency in dependencies
+                ),
+            )
+
+
+def run_async(dependencies, url, concurrency):
+    return list(
+        check_concurrently(dependencies, concurrency=concurrency, base_url=url)
+    )
+
+
+@click.command()
+@click.option("--dependencies", "amount", default=1000, show_default=True)
+@click.option("--latency", default=0.05, show_default=True)
+@click.option("--workers", default=4, show_default=True)
+@click.option("--concurrency", default=100, show_default=True)
+def main(amount, latency, workers, concurrency):
+    dependencies = [
+        Dependency("com.example", f"artifact-{i}", "1.0")
+        for i in range(amount)
+    ]
+    timings = {}
+    with FakeClearlyDefinedServer(DEFINITIONS, latency=latency) as server:
+        for name, run, width in (
+            ("thread", run_thread, workers),
+            ("async", run_async, concurrency),
+        ):
+            start = time.perf_counter()
+            results = run(dependencies, server.url, width)
+            timings[name] = time.perf_counter() - start
+            assert len(results) == amount
+            assert all(result.success for result in results)
+    click.echo(json.dumps(timings, indent=2))
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
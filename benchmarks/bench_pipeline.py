@@ -0,0 +1,215 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Time every stage of the pipeline on synthetic BOMs, and compare the timings
+to a stored baseline. Run from the root of the repository::
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 100,1000 --save
+
+The command exits with status 1 if a stage became slower than its baseline by
+more than the tolerance. Baselines depend on the machine, so record them with
+``--save`` on the machine that runs the comparison.
+"""
+
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Tuple
+
+import click
+
+from liferay_inbound_checker.check import Whitelist, check
+from liferay_inbound_checker.clearlydefined import (
+    ClearlyDefinedClient,
+    ClearlyDefinedDefinitions,
+    license_keys,
+)
+from liferay_inbound_checker.cli import WORKERS, check_dependencies
+from liferay_inbound_checker.dependencies import (
+    convert_to_tree,
+    dependencies_from_tree,
+    iter_dependencies,
+)
+from liferay_inbound_checker.retry import RetryPolicy
+from tests.fakeserver import FakeClearlyDefinedServer
+
+from .synthetic import (
+    synthetic_definitions,
+    synthetic_dependencies,
+    synthetic_pom,
+)
+
+#: Where baselines are stored by default.
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+#: Timings below this many seconds are too noisy to count as regressions.
+NOISE_FLOOR = 0.005
+
+
+def best_of(func: Callable, repeat: int) -> float:
+    """Return the fastest of *repeat* runs of *func*, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def stages(amount: int, url: str) -> Iterator[Tuple[str, Callable]]:
+    """Yield the name and a function that runs every stage for a BOM of
+    *amount* dependencies. Definitions are requested from *url*.
+    """
+    dependencies = synthetic_dependencies(amount)
+    pom = synthetic_pom(dependencies)
+    root = convert_to_tree(pom)
+    json_dicts = [synthetic_definitions(seed) for seed in range(amount)]
+    whitelist = Whitelist(
+        {
+            "name": f"{dependency.groupid}/{dependency.artifactid}",
+            "version": "*",
+        }
+        for dependency in dependencies[::10]
+    )
+
+    encoded = pom.encode("utf-8")
+    # The command line interface parses the POM with iter_dependencies. The
+    # tree-based functions are still public, so they are timed as well.
+    yield "iter_dependencies", lambda: list(
+        iter_dependencies(io.BytesIO(encoded))
+    )
+    yield "convert_to_tree", lambda: convert_to_tree(pom)
+    yield "dependencies_from_tree", lambda: dependencies_from_tree(root)
+
+    def discovered_licenses():
+        for json_dict in json_dicts:
+            ClearlyDefinedDefinitions(json_dict).discovered_licenses
+
+    yield "discovered_licenses", discovered_licenses
+
+    def check_prefetched():
+        prefetched = {
+            dependency: ClearlyDefinedDefinitions(json_dict)
+            for dependency, json_dict in zip(dependencies, json_dicts)
+        }
+        for dependency in dependencies:
+            check(dependency, whitelist, prefetched)
+
+    yield "check", check_prefetched
+
+    def pipeline():
+        client = ClearlyDefinedClient(
+            pool_size=WORKERS,
+            base_url=url,
+            retry_policy=RetryPolicy(backoff=0.01, max_backoff=0.1),
+        )
+        with client, contextlib.redirect_stdout(io.StringIO()):
+            check_dependencies(dependencies, whitelist, client=client)
+
+    yield "check_dependencies", pipeline
+
+
+def compare(
+    timings: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> Iterator[str]:
+    """Yield a description of every timing that regressed compared to
+    *baseline* by more than *tolerance*, a fraction.
+    """
+    for name, seconds in sorted(timings.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if seconds > previous * (1 + tolerance) and (
+            seconds - previous > NOISE_FLOOR
+        ):
+            yield (
+                f"{name}: {seconds:.4f}s, was {previous:.4f}s"
+                f" (+{seconds / previous - 1:.0%})"
+            )
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    default="100,1000,10000",
+    show_default=True,
+    help="Comma-separated amounts of dependencies in the synthetic BOMs.",
+)
+@click.option("--repeat", default=3, show_default=True)
+@click.option("--latency", default=0.01, show_default=True)
+@click.option("--error-rate", default=0.02, show_default=True)
+@click.option(
+    "--baseline",
+    default=str(BASELINE_PATH),
+    show_default=True,
+    type=click.Path(dir_okay=False),
+)
+@click.option(
+    "--tolerance",
+    default=0.25,
+    show_default=True,
+    help="Fraction by which a stage may be slower than its baseline.",
+)
+@click.option("--save", is_flag=True, help="Store the timings as baseline.")
+def main(sizes, repeat, latency, error_rate, baseline, tolerance, save):
+    # Modules that are imported on first use are imported here, so that the
+    # first stage to use them is not charged for it.
+    license_keys("MIT")
+    ClearlyDefinedClient().session.close()
+
+    timings = {}
+    with FakeClearlyDefinedServer(
+        synthetic_definitions(), latency=latency, error_rate=error_rate
+    ) as server:
+        for amount in map(int, sizes.split(",")):
+            for name, func in stages(amount, server.url):
+                key = f"{name}[{amount}]"
+                timings[key] = best_of(func, repeat)
+                click.echo(f"{key:<32} {timings[key]:>9.4f}s")
+
+    baseline_path = Path(baseline)
+    if save:
+        baseline_path.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "latency": latency,
+                    "error_rate": error_rate,
+                    "timings": timings,
+                },
+                indent=2,
+                sort_keys=True,
+            )
+            + "\n"
+        )
+        click.echo(f"Stored baseline in {baseline_path}.")
+        return
+    if not baseline_path.exists():
+        click.echo(f"No baseline in {baseline_path}; run with --save.")
+        return
+
+    regressions = list(
+        compare(
+            timings,
+            json.loads(baseline_path.read_text())["timings"],
+            tolerance,
+        )
+    )
+    if regressions:
+        click.echo()
+        click.echo("Regressions:")
+        for regression in regressions:
+            click.echo(f"  {regression}")
+        sys.exit(1)
+    click.echo()
+    click.echo("No regressions.")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Time how long the command line interface takes to start, and compare it to
+a stored baseline. Run from the root of the repository::
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --save
+
+Like :mod:`benchmarks.bench_pipeline`, the command exits with status 1 if
+startup became slower than its baseline by more than the tolerance.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import click
+
+from .bench_pipeline import best_of, compare
+
+#: Where the baseline is stored by default.
+BASELINE_PATH = Path(__file__).parent / "startup.json"
+
+#: Commands whose startup is timed, by name.
+COMMANDS = {
+    "python": [sys.executable, "-c", "pass"],
+    "import": [sys.executable, "-c", "import liferay_inbound_checker.cli"],
+    "--help": [sys.executable, "-m", "liferay_inbound_checker.cli", "--help"],
+}
+
+
+def _run(command):
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+
+@click.command()
+@click.option("--repeat", default=20, show_default=True)
+@click.option(
+    "--baseline",
+    default=str(BASELINE_PATH),
+    show_default=True,
+    type=click.Path(dir_okay=False),
+)
+@click.option(
+    "--tolerance",
+    default=0.25,
+    show_default=True,
+    help="Fraction by which startup may be slower than its baseline.",
+)
+@click.option("--save", is_flag=True, help="Store the timings as baseline.")
+def main(repeat, baseline, tolerance, save):
+    timings = {}
+    for name, command in COMMANDS.items():
+        timings[name] = best_of(lambda: _run(command), repeat)
+        click.echo(f"{name:<10} {timings[name]:>9.4f}s")
+
+    baseline_path = Path(baseline)
+    if save:
+        baseline_path.write_text(
+            json.dumps({"timings": timings}, indent=2, sort_keys=True) + "\n"
+        )
+        click.echo(f"Stored baseline in {baseline_path}.")
+        return
+    if not baseline_path.exists():
+        click.echo(f"No baseline in {baseline_path}; run with --save.")
+        return
+
+    regressions = list(
+        compare(
+            timings,
+            json.loads(baseline_path.read_text())["timings"],
+            tolerance,
+        )
+    )
+    if regressions:
+        click.echo()
+        click.echo("Regressions:")
+        for regression in regressions:
+            click.echo(f"  {regression}")
+        sys.exit(1)
+    click.echo()
+    click.echo("No regressions.")
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Synthetic third-party BOMs and ClearlyDefined definitions of any size."""
+
+import random
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+from liferay_inbound_checker.dependencies import Dependency
+
+#: Discovered license expressions, roughly in the proportions in which they
+#: occur in the Portal BOM.
+EXPRESSIONS = [
+    "Apache-2.0",
+    "Apache-2.0",
+    "Apache-2.0",
+    "MIT",
+    "BSD-3-Clause",
+    "EPL-1.0 OR LGPL-2.1-or-later",
+    "Apache-2.0 AND MIT",
+    "(CDDL-1.1 OR GPL-2.0-only WITH Classpath-exception-2.0) AND Apache-2.0",
+    "NOASSERTION",
+    "LicenseRef-scancode-unknown",
+]
+
+_POM_HEADER = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>com.liferay.portal</groupId>
+  <artifactId>release.portal.bom.third.party</artifactId>
+  <version>unspecified</version>
+  <packaging>pom</packaging>
+  <dependencyManagement>
+    <dependencies>
+"""
+
+_POM_DEPENDENCY = """\
+      <dependency>
+        <groupId>{}</groupId>
+        <artifactId>{}</artifactId>
+        <version>{}</version>
+      </dependency>
+"""
+
+_POM_FOOTER = """\
+    </dependencies>
+  </dependencyManagement>
+</project>
+"""
+
+
+def synthetic_dependencies(amount: int, seed: int = 0) -> List[Dependency]:
+    """Return *amount* distinct dependencies with plausible names and
+    versions.
+    """
+    rng = random.Random(seed)
+    groupids = [f"org.example.group{i}" for i in range(max(1, amount // 20))]
+    return [
+        Dependency(
+            rng.choice(groupids),
+            f"artifact-{i}",
+            f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 9)}",
+        )
+        for i in range(amount)
+    ]
+
+
+def synthetic_pom(dependencies: List[Dependency]) -> str:
+    """Return a third-party BOM that manages *dependencies*."""
+    return "".join(
+        [_POM_HEADER]
+        + [
+            _POM_DEPENDENCY.format(*map(escape, dependency))
+            for dependency in dependencies
+        ]
+        + [_POM_FOOTER]
+    )
+
+
+def synthetic_definitions(seed: int = 0) -> Dict:
+    """Return the JSON dictionary of ClearlyDefined definitions with a random
+    score and random discovered licenses.
+    """
+    rng = random.Random(seed)
+    return {
+        "described": {"hashes": {"sha1": f"{rng.getrandbits(160):040x}"}},
+        "licensed": {
+            "declared": rng.choice(EXPRESSIONS),
+            "facets": {
+                "core": {
+                    "discovered": {
+                        "expressions": rng.sample(
+                            EXPRESSIONS, rng.randint(0, 3)
+                        )
+                    }
+                }
+            },
+        },
+        "scores": {"effective": rng.randint(60, 100)},
+    }
@@ -22,6 +22,36 @@ def cwd(path):
         os.chdir(old_pwd)
 
 
+@contextmanager
+def atomic_write(path, mode="w", **kwargs):
+    """Open a temporary file next to *path* for writing, and replace *path*
+    with it if the block succeeds. Readers never see a partial file, and every
+    writer has a temporary file of its own, so that concurrent writers of the
+    same path do not get in each other's way.
+    """
+    import tempfile
+
+    path = os.fspath(path)
+    directory, name = os.path.split(path)
+    with tempfile.NamedTemporaryFile(
+        mode,
+        dir=directory or ".",
+        prefix=f".{name}.",
+        suffix=".tmp",
+        delete=False,
+        **kwargs,
+    ) as fp:
+        try:
+            yield fp
+        except BaseException:
+            fp.close()
+            os.unlink(fp.name)
+            raise
+    # Temporary files are only readable by their owner.
+    os.chmod(fp.name, 0o644)
+    os.replace(fp.name, path)
+
+
 # This whitelist is manually copied from the Liferay Inbound Licensing Policy.
 LICENSE_WHITELIST = [
     "0BSD",
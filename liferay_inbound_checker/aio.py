@@ -0,0 +1,270 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Asynchronous checking of dependencies, which keeps many requests to
+ClearlyDefined in flight at the same time.
+
+This module requires aiohttp, which is installed with the ``async`` extra.
+"""
+
+import asyncio
+import json
+import time
+from itertools import count
+from typing import Callable, Dict, Iterable, Iterator, Mapping, Tuple
+
+import aiohttp
+from requests import RequestException
+
+from . import instrumentation
+from .cache import DefinitionsCache
+from .check import (
+    RequestExceptionReason,
+    Result,
+    Whitelist,
+    evaluate,
+    is_whitelisted,
+)
+from .clearlydefined import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TIMEOUT,
+    DEFINITIONS_URL,
+    ClearlyDefinedDefinitions,
+    _cache_definitions,
+    _conditional_headers,
+    clearlydefined_url,
+)
+from .dependencies import Dependency
+from .retry import RateLimiter, Retry, RetryPolicy
+
+
+class AsyncClearlyDefinedClient:
+    """Asynchronous counterpart of
+    :class:`~liferay_inbound_checker.clearlydefined.ClearlyDefinedClient`. At
+    most *concurrency* requests are in flight at the same time.
+
+    The client must be used as an asynchronous context manager.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: DefinitionsCache = None,
+        base_url: str = DEFINITIONS_URL,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+    ):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = cache
+        self.base_url = base_url
+        self.rate_limiter = (
+            rate_limiter if rate_limiter is not None else RateLimiter()
+        )
+        self.retry_policy = (
+            retry_policy if retry_policy is not None else RetryPolicy()
+        )
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *args):
+        await self._session.close()
+
+    async def _get(
+        self,
+        url: str,
+        on_retry: Callable[[Retry], None] = None,
+        headers: Dict[str, str] = None,
+    ) -> Tuple[int, Mapping[str, str], str]:
+        """Get *url*, retrying as long as the retry policy allows, and return
+        the status code, headers and text of the response. Every retry is
+        passed to *on_retry*.
+
+        :raises requests.RequestException: if the last attempt failed without
+            a response.
+        """
+        for attempt in count():
+            await asyncio.sleep(self.rate_limiter.reserve())
+            try:
+                async with self._semaphore:
+                    with instrumentation.timer(
+                        "clearlydefined.requests", endpoint="definitions"
+                    ):
+                        async with self._session.get(
+                            url, headers=headers
+                        ) as response:
+                            status = response.status
+                            response_headers = response.headers
+                            text = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                instrumentation.count(
+                    "clearlydefined.responses", status="error"
+                )
+                if not self.retry_policy.should_retry(attempt):
+                    raise RequestException(
+                        f"Could not retrieve '{url}': {err!r}"
+                    ) from err
+                cause = repr(err)
+                delay = self.retry_policy.delay(attempt)
+            else:
+                instrumentation.count(
+                    "clearlydefined.responses", status=str(status)
+                )
+                if not self.retry_policy.should_retry(attempt, status):
+                    return status, response_headers, text
+                cause = status
+                delay = self.retry_policy.delay(
+                    attempt, response_headers.get("Retry-After")
+                )
+                if status == 429:
+                    self.rate_limiter.pause(delay)
+            instrumentation.count("clearlydefined.retries")
+            if on_retry is not None:
+                on_retry(Retry(url, attempt + 1, cause, delay))
+            await asyncio.sleep(delay)
+
+    async def definitions(
+        self, dependency: Dependency, on_retry: Callable[[Retry], None] = None
+    ) -> Dict:
+        """
+        :raises requests.RequestException: if the request could not be made.
+        """
+        url = clearlydefined_url(dependency, self.base_url)
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            if entry is not None and entry.fresh:
+                return entry.json_dict
+
+        status, headers, text = await self._get(
+            url, on_retry=on_retry, headers=_conditional_headers(entry)
+        )
+
+        if status == 304 and entry is not None:
+            instrumentation.count("cache.revalidated")
+            self.cache.refresh(url)
+            return entry.json_dict
+        if status == 200:
+            json_dict = json.loads(text)
+            _cache_definitions(
+                self.cache,
+                url,
+                json_dict,
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified"),
+            )
+            return json_dict
+        raise RequestException(f"Status code of '{url}' was {status}")
+
+
+async def check_async(
+    dependency: Dependency,
+    client: AsyncClearlyDefinedClient,
+    whitelist: Whitelist = None,
+    prefetched: Dict[Dependency, ClearlyDefinedDefinitions] = None,
+) -> Result:
+    """Asynchronous counterpart of :func:`liferay_inbound_checker.check.check`.
+    """
+    started = time.perf_counter()
+    result = await _check_async(dependency, client, whitelist, prefetched)
+    result.duration = time.perf_counter() - started
+    return result
+
+
+async def _check_async(
+    dependency: Dependency,
+    client: AsyncClearlyDefinedClient,
+    whitelist: Whitelist,
+    prefetched: Dict[Dependency, ClearlyDefinedDefinitions],
+) -> Result:
+    if whitelist is None:
+        whitelist = Whitelist()
+    if prefetched is None:
+        prefetched = {}
+
+    result = Result(dependency)
+    result.success = True
+
+    if is_whitelisted(dependency, whitelist):
+        return result
+
+    try:
+        definitions = prefetched.get(dependency)
+        if definitions is None:
+            definitions = ClearlyDefinedDefinitions(
+                await client.definitions(
+                    dependency, on_retry=result.retries.append
+                )
+            )
+    except RequestException as err:
+        result.success = False
+        result.reasons = [
+            RequestExceptionReason(
+                clearlydefined_url(dependency, client.base_url), str(err)
+            )
+        ]
+        return result
+
+    return evaluate(result, definitions)
+
+
+def check_concurrently(
+    dependencies: Iterable[Dependency],
+    whitelist: Whitelist = None,
+    prefetched: Dict[Dependency, ClearlyDefinedDefinitions] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache: DefinitionsCache = None,
+    base_url: str = DEFINITIONS_URL,
+    rate_limiter: RateLimiter = None,
+    retry_policy: RetryPolicy = None,
+) -> Iterator[Result]:
+    """Check *dependencies* on an event loop, with up to *concurrency* requests
+    to ClearlyDefined in flight. Every dependency is evaluated as soon as its
+    definitions arrive, and the results are yielded in order of completion.
+    """
+    loop = asyncio.new_event_loop()
+    client = AsyncClearlyDefinedClient(
+        concurrency=concurrency,
+        timeout=timeout,
+        cache=cache,
+        base_url=base_url,
+        rate_limiter=rate_limiter,
+        retry_policy=retry_policy,
+    )
+    pending = set()
+    try:
+        loop.run_until_complete(client.__aenter__())
+        pending = {
+            loop.create_task(
+                check_async(dependency, client, whitelist, prefetched)
+            )
+            for dependency in dependencies
+        }
+        while pending:
+            done, pending = loop.run_until_complete(
+                asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        # The caller may stop iterating early.
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True)
+            )
+        if client._session is not None:
+            loop.run_until_complete(client.__aexit__(None, None, None))
+        loop.close()
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Store of the dependencies of Portal revisions.
+
+Many pull requests share the same base commit, so the dependencies of a commit
+are stored once and reused, instead of generating the POM of the base commit
+over and over again. Each commit is stored as a sorted text file of
+tab-separated coordinates, named after the SHA of the commit.
+"""
+
+from os import PathLike
+from pathlib import Path
+from typing import FrozenSet, Iterable, Optional
+
+from . import atomic_write
+from .dependencies import Dependency
+
+#: Maximum amount of commits in the store. When there are more, the least
+#: recently stored commits are evicted.
+DEFAULT_MAX_ENTRIES = 100
+
+
+class BomStore:
+    """Dependencies of commits, stored in *directory*."""
+
+    def __init__(
+        self, directory: PathLike, max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+
+    def _path(self, sha: str) -> Path:
+        return self.directory / f"{sha}.txt"
+
+    def get(self, sha: str) -> Optional[FrozenSet[Dependency]]:
+        """Return the dependencies of commit *sha*, or None if they are not in
+        the store.
+        """
+        try:
+            text = self._path(sha).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        return frozenset(
+            Dependency(*line.split("\t")) for line in text.splitlines()
+        )
+
+    def set(self, sha: str, dependencies: Iterable[Dependency]):
+        """Store the *dependencies* of commit *sha*."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lines = sorted({"\t".join(dependency) for dependency in dependencies})
+        with atomic_write(self._path(sha), encoding="utf-8") as fp:
+            fp.writelines(f"{line}\n" for line in lines)
+        self.prune()
+
+    def prune(self):
+        """Evict the least recently stored commits beyond *max_entries*."""
+        paths = sorted(
+            self.directory.glob("*.txt"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for path in paths[self.max_entries :]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return sum(1 for _ in self.directory.glob("*.txt"))
@@ -0,0 +1,244 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Persistent on-disk cache of ClearlyDefined definitions."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from os import PathLike
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from . import instrumentation
+
+#: Seconds after which cached definitions are considered stale.
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+#: Maximum amount of definitions in the cache. When there are more, the least
+#: recently used definitions are evicted.
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def default_cache_dir() -> Path:
+    """Return the directory in which the cache is stored by default."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "liferay_inbound_checker"
+
+
+class CacheEntry(NamedTuple):
+    """Cached definitions and the validators of the response they came from."""
+
+    json_dict: Dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+
+def _encode(json_dict: Dict) -> bytes:
+    return zlib.compress(json.dumps(json_dict).encode("utf-8"))
+
+
+def _decode(body: bytes) -> Dict:
+    return json.loads(zlib.decompress(body).decode("utf-8"))
+
+
+class SQLiteStore:
+    """Base class of the SQLite-backed caches in *directory*. Entries expire
+    *ttl* seconds after they were stored, and the cache is trimmed down to
+    *max_entries* entries by evicting the least recently used ones.
+
+    Subclasses define the name of the database file in :attr:`FILENAME`, their
+    table in :attr:`TABLE` and :attr:`SCHEMA`, and which entries :meth:`prune`
+    removes in :attr:`EXPIRED`. The table must have an ``accessed`` column.
+
+    A single cache can be shared between threads.
+    """
+
+    FILENAME = None
+    TABLE = None
+    #: Version of :attr:`SCHEMA`. Increase it to throw away existing caches
+    #: when the schema changes.
+    SCHEMA_VERSION = 1
+    #: Statements that create the table and its indices.
+    SCHEMA = ()
+    #: SQL condition that matches expired entries, given the time before which
+    #: entries are expired.
+    EXPIRED = None
+
+    def __init__(
+        self,
+        directory: PathLike,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(directory / self.FILENAME),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._setup()
+
+    def _setup(self):
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                # This is a cache; throwing it away is always safe.
+                cursor.execute(f"DROP TABLE IF EXISTS {self.TABLE}")
+                cursor.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+            for statement in self.SCHEMA:
+                cursor.execute(statement)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Evict stale entries and close the database."""
+        self.prune()
+        with self._lock:
+            self._connection.close()
+
+    def prune(self):
+        """Remove expired entries, and evict the least recently used entries
+        until at most :attr:`max_entries` remain.
+        """
+        with self._lock:
+            self._connection.execute(
+                f"DELETE FROM {self.TABLE} WHERE {self.EXPIRED}",
+                (time.time() - self.ttl,),
+            )
+            self._connection.execute(
+                f"""
+                DELETE FROM {self.TABLE} WHERE rowid IN (
+                    SELECT rowid FROM {self.TABLE}
+                    ORDER BY accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT COUNT(*) FROM {self.TABLE}"
+            ).fetchone()[0]
+
+
+class DefinitionsCache(SQLiteStore):
+    """SQLite-backed cache of ClearlyDefined definitions, keyed by the URL of
+    the definitions. Entries expire *ttl* seconds after they were fetched, and
+    the cache is trimmed down to *max_entries* entries by evicting the least
+    recently used ones. Expired entries that can be revalidated are kept until
+    they are evicted.
+
+    A single cache can be shared between threads.
+    """
+
+    FILENAME = "definitions.sqlite"
+    TABLE = "definitions"
+    SCHEMA_VERSION = 2
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS definitions (
+            url TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            fetched REAL NOT NULL,
+            accessed REAL NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS definitions_accessed
+        ON definitions (accessed)
+        """,
+    )
+    EXPIRED = "fetched < ? AND etag IS NULL AND last_modified IS NULL"
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Return the cache entry of *url*, or None if there is none. Expired
+        entries are returned as well, so that they can be revalidated.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT body, etag, last_modified, fetched
+                FROM definitions WHERE url = ?
+                """,
+                (url,),
+            ).fetchone()
+            if row is None:
+                instrumentation.count("cache.lookups", outcome="miss")
+                return None
+            self._connection.execute(
+                "UPDATE definitions SET accessed = ? WHERE url = ?", (now, url)
+            )
+        body, etag, last_modified, fetched = row
+        fresh = fetched + self.ttl >= now
+        instrumentation.count(
+            "cache.lookups", outcome="hit" if fresh else "stale"
+        )
+        return CacheEntry(_decode(body), etag, last_modified, fresh)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached definitions of *url*, or None if there are none or
+        if they have expired.
+        """
+        entry = self.lookup(url)
+        if entry is None or not entry.fresh:
+            return None
+        return entry.json_dict
+
+    def set(
+        self,
+        url: str,
+        json_dict: Dict,
+        etag: str = None,
+        last_modified: str = None,
+    ):
+        """Store the definitions of *url*, alongside the validators of the
+        response they came from.
+        """
+        now = time.time()
+        body = _encode(json_dict)
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO definitions
+                    (url, body, etag, last_modified, fetched, accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (url, body, etag, last_modified, now, now),
+            )
+
+    def refresh(self, url: str):
+        """Mark the definitions of *url* as freshly fetched, for instance after
+        ClearlyDefined confirmed that they have not changed.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                """
+                UPDATE definitions SET fetched = ?, accessed = ?
+                WHERE url = ?
+                """,
+                (now, now, url),
+            )
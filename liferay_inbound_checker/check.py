@@ -2,38 +2,190 @@
 #
 # SPDX-License-Identifier: LGPL-2.1-or-later
 
+import fnmatch
+import hashlib
+import re
+import time
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 from inspect import cleandoc
 from os import PathLike
-from typing import Dict, Iterator, List
+from typing import Dict, Iterable, Iterator, List, Union
 
-import yaml
-from requests import RequestException
-
-from liferay_inbound_checker import LICENSE_WHITELIST
+from liferay_inbound_checker import LICENSE_WHITELIST, instrumentation
 from liferay_inbound_checker.clearlydefined import (
+    ClearlyDefinedClient,
     ClearlyDefinedDefinitions,
     clearlydefined_url,
     definitions_from_clearlydefined,
 )
 from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.snapshot import MissingFromSnapshot
+from liferay_inbound_checker.versions import (
+    ANY_VERSION,
+    MavenVersion,
+    Restriction,
+    is_version_range,
+    parse_version_range,
+)
+
+#: Characters that make the name of a whitelist entry a glob pattern.
+_GLOB_CHARS = frozenset("*?[")
+
+
+class Whitelist:
+    """Index of the dependencies in the *entries* of a whitelist, which look
+    like ``{"name": "groupid/artifactid", "version": "version"}``.
+
+    The version may also be a Maven version range such as ``[5.0,6.0)``, or
+    ``*`` for any version. The name may contain glob patterns such as
+    ``org.springframework/spring-*``.
+
+    Entries are compiled into three tiers. Exact names and versions go into a
+    hash set. Exact names with version ranges go into a table from
+    ``(groupid, artifactid)`` to restrictions sorted by their lower bound.
+    Names with glob patterns, which should be rare, are matched one by one.
+
+    Malformed entries are skipped. A description of each of them is collected
+    in :attr:`errors`. :attr:`digest` is a hash of the valid entries, which
+    changes whenever the whitelist matches different dependencies.
+    """
+
+    def __init__(self, entries: Iterable[Dict] = None):
+        self._dependencies = set()
+        self._ranges = {}
+        self._patterns = []
+        self._size = 0
+        self.errors = []
+        valid = []
+        for number, item in enumerate(entries or [], start=1):
+            try:
+                name, version = item["name"], item["version"]
+            except (KeyError, TypeError):
+                self.errors.append(
+                    f"Entry {number} does not have a name and a version."
+                )
+                continue
+            if not isinstance(name, str) or not isinstance(version, str):
+                self.errors.append(
+                    f"Entry {number} does not have a textual name and version."
+                    f" Put them in quotes."
+                )
+                continue
+            groupid, has_slash, artifactid = name.partition("/")
+            if not has_slash:
+                self.errors.append(
+                    f"Entry {number} has the name '{name}', which is not of"
+                    f" the form 'groupid/artifactid'."
+                )
+                continue
+            try:
+                self._add(groupid, artifactid, version)
+            except ValueError as err:
+                self.errors.append(f"Entry {number}: {err}.")
+                continue
+            self._size += 1
+            valid.append(f"{name}\t{version}")
+        self.digest = hashlib.sha256(
+            "\n".join(sorted(valid)).encode("utf-8")
+        ).hexdigest()
+
+        for ranges in self._ranges.values():
+            ranges.sort()
+
+    def _add(self, groupid: str, artifactid: str, version: str):
+        if version == "*":
+            restrictions = [ANY_VERSION]
+        elif is_version_range(version):
+            restrictions = parse_version_range(version)
+        else:
+            restrictions = None
+
+        if any(char in groupid + artifactid for char in _GLOB_CHARS):
+            pattern = re.compile(fnmatch.translate(f"{groupid}/{artifactid}"))
+            self._patterns.append((pattern.match, restrictions or version))
+        elif restrictions is None:
+            self._dependencies.add(Dependency(groupid, artifactid, version))
+        else:
+            self._ranges.setdefault((groupid, artifactid), _Ranges()).extend(
+                restrictions
+            )
+
+    def __contains__(self, dependency: Dependency) -> bool:
+        if dependency in self._dependencies:
+            return True
+        if not self._ranges and not self._patterns:
+            return False
+
+        version = MavenVersion(dependency.version)
+        ranges = self._ranges.get((dependency.groupid, dependency.artifactid))
+        if ranges is not None and version in ranges:
+            return True
+        name = f"{dependency.groupid}/{dependency.artifactid}"
+        for match, spec in self._patterns:
+            if match(name) is None:
+                continue
+            if isinstance(spec, str):
+                if spec == dependency.version:
+                    return True
+            elif any(version in restriction for restriction in spec):
+                return True
+        return False
+
+    def __len__(self):
+        return self._size
+
+
+class _Ranges:
+    """The version restrictions of a single artifact. Restrictions without a
+    lower bound are always checked; the others are sorted by their lower bound,
+    so that only those that start at or below a version are checked.
+    """
+
+    __slots__ = ("_unbounded", "_lowers", "_bounded")
+
+    def __init__(self):
+        self._unbounded = []
+        self._lowers = []
+        self._bounded = []
+
+    def extend(self, restrictions: Iterable[Restriction]):
+        for restriction in restrictions:
+            if restriction.lower is None:
+                self._unbounded.append(restriction)
+            else:
+                self._bounded.append(restriction)
+
+    def sort(self):
+        self._bounded.sort(key=lambda restriction: restriction.lower)
+        self._lowers = [restriction.lower for restriction in self._bounded]
 
+    def __contains__(self, version: MavenVersion) -> bool:
+        if any(version in restriction for restriction in self._unbounded):
+            return True
+        end = bisect_right(self._lowers, version)
+        return any(version in self._bounded[i] for i in range(end - 1, -1, -1))
+
+
+def load_whitelist(path: PathLike) -> Whitelist:
+    """Given a path, parse the yaml inside and index it."""
+    import yaml
 
-def load_whitelist(path: PathLike) -> List[Dict]:
-    """Given a path, parse the yaml inside."""
     with open(path) as fp:
-        return yaml.safe_load(fp)
+        entries = yaml.safe_load(fp)
+    if entries is not None and not isinstance(entries, list):
+        whitelist = Whitelist()
+        whitelist.errors.append("The whitelist is not a list of entries.")
+        return whitelist
+    return Whitelist(entries)
 
 
-def is_whitelisted(dependency: Dependency, whitelist: List[Dict]) -> bool:
-    name = f"{dependency.groupid}/{dependency.artifactid}"
-    for item in whitelist:
-        try:
-            if item["name"] == name and item["version"] == dependency.version:
-                return True
-        except (KeyError, TypeError):
-            continue
-    return False
+def is_whitelisted(
+    dependency: Dependency, whitelist: Union[Whitelist, List[Dict]]
+) -> bool:
+    if not isinstance(whitelist, Whitelist):
+        whitelist = Whitelist(whitelist)
+    return dependency in whitelist
 
 
 class BaseCheck(ABC):
@@ -93,6 +245,23 @@ class Reason:
 
     ADVICE = ""
 
+    def to_dict(self) -> Dict:
+        """Return the class name and the attributes of the reason, as a
+        JSON-serialisable dictionary.
+        """
+        return {"class": type(self).__name__, "attributes": vars(self)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Reason":
+        """Inverse of :meth:`to_dict`.
+
+        :raises KeyError: if there is no reason class of that name.
+        """
+        reason_cls = _reason_classes()[data["class"]]
+        reason = reason_cls.__new__(reason_cls)
+        reason.__dict__.update(data["attributes"])
+        return reason
+
     def __str__(self):
         return str(self.ADVICE)
 
@@ -103,7 +272,7 @@ class RequestExceptionReason(Reason):
     ADVICE = cleandoc(
         """
         {url}: {err}
-        There was an error in retrieving a result from an internet API. This error should be investigated. Alternatively, simply try running the test again, and hope it works.
+        There was an error in retrieving a result from an internet API, even after retrying the request. This error should be investigated. If the API is rate limiting requests, try running the test again with a rate limit, for instance --rate-limit 5, or with a lower rate limit if one is already set.
         """
     )
 
@@ -115,6 +284,17 @@ class RequestExceptionReason(Reason):
         return self.ADVICE.format(url=self.url, err=self.err)
 
 
+class MissingFromSnapshotReason(RequestExceptionReason):
+    """The definitions are not in the offline snapshot."""
+
+    ADVICE = cleandoc(
+        """
+        {url}: {err}
+        The definitions of the dependency are not in the offline snapshot, probably because the dependency was added after the snapshot was exported. Export the snapshot again with the export-snapshot command, or run the test again without --offline.
+        """
+    )
+
+
 class NoDiscoveredLicensesReason(Reason):
     ADVICE = cleandoc(
         """
@@ -161,16 +341,74 @@ class ScoreTooLowReason(Reason):
         )
 
 
+def _reason_classes() -> Dict[str, type]:
+    classes = {}
+    pending = [Reason]
+    while pending:
+        reason_cls = pending.pop()
+        classes[reason_cls.__name__] = reason_cls
+        pending.extend(reason_cls.__subclasses__())
+    return classes
+
+
 class Result:
     def __init__(self, dependency=None):
         self.dependency = dependency
         self.success = None
         self.reasons = []
+        #: :class:`~liferay_inbound_checker.retry.Retry` records of the
+        #: requests that were made for this result.
+        self.retries = []
+        #: Whether the result was served from a
+        #: :class:`~liferay_inbound_checker.results.ResultCache`.
+        self.cached = False
+        #: Seconds that checking took, or None if the dependency was not
+        #: checked in this run.
+        self.duration = None
+        #: Whether the result was evaluated from empty definitions, which
+        #: ClearlyDefined sometimes returns before it has harvested the
+        #: dependency.
+        self.empty_definitions = False
+
+
+def check(
+    dependency: Dependency,
+    whitelist: Whitelist = None,
+    prefetched: Dict[Dependency, ClearlyDefinedDefinitions] = None,
+    client: ClearlyDefinedClient = None,
+) -> Result:
+    """Check *dependency*. If the definitions of *dependency* are in
+    *prefetched*, use those instead of retrieving them from ClearlyDefined
+    using *client*.
+    """
+    started = time.perf_counter()
+    result = _check(dependency, whitelist, prefetched, client)
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def request_failed(dependency: Dependency, err: str) -> Result:
+    """Return the failed result of *dependency*, whose definitions could not
+    be retrieved because of *err*.
+    """
+    result = Result(dependency)
+    result.success = False
+    result.reasons = [
+        RequestExceptionReason(clearlydefined_url(dependency), err)
+    ]
+    return result
 
 
-def check(dependency: Dependency, whitelist: List[Dict] = None) -> Result:
+def _check(
+    dependency: Dependency,
+    whitelist: Whitelist,
+    prefetched: Dict[Dependency, ClearlyDefinedDefinitions],
+    client: ClearlyDefinedClient,
+) -> Result:
     if whitelist is None:
-        whitelist = []
+        whitelist = Whitelist()
+    if prefetched is None:
+        prefetched = {}
 
     result = Result(dependency)
     result.success = True
@@ -178,23 +416,37 @@ def check(dependency: Dependency, whitelist: List[Dict] = None) -> Result:
     if is_whitelisted(dependency, whitelist):
         return result
 
-    try:
-        definitions = ClearlyDefinedDefinitions(
-            definitions_from_clearlydefined(dependency)
-        )
-    except RequestException as err:
-        result.success = False
-        result.reasons = [
-            RequestExceptionReason(
-                clearlydefined_url(result.dependency), str(err),
-            )
-        ]
-        return result
+    definitions = prefetched.get(dependency)
+    if definitions is None:
+        from requests import RequestException
 
-    for check_cls in (ScoreCheck, LicenseWhitelistedCheck):
-        check = check_cls()
-        if not check.process(definitions):
+        try:
+            definitions = ClearlyDefinedDefinitions(
+                definitions_from_clearlydefined(
+                    dependency, client=client, on_retry=result.retries.append
+                )
+            )
+        except (RequestException, MissingFromSnapshot) as err:
+            reason_cls = RequestExceptionReason
+            if isinstance(err, MissingFromSnapshot):
+                reason_cls = MissingFromSnapshotReason
             result.success = False
-            result.reasons.extend(check.reasons)
+            result.reasons = [
+                reason_cls(clearlydefined_url(result.dependency), str(err))
+            ]
+            return result
+
+    return evaluate(result, definitions)
+
+
+def evaluate(result: Result, definitions: ClearlyDefinedDefinitions) -> Result:
+    """Run all checks on *definitions* and record the outcome in *result*."""
+    result.empty_definitions = definitions.is_empty()
+    with instrumentation.timer("evaluate"):
+        for check_cls in (ScoreCheck, LicenseWhitelistedCheck):
+            check = check_cls()
+            if not check.process(definitions):
+                result.success = False
+                result.reasons.extend(check.reasons)
 
     return result
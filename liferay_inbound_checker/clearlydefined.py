@@ -3,97 +3,607 @@
 # SPDX-License-Identifier: LGPL-2.1-or-later
 
 import json
-from contextlib import suppress
-from typing import Dict, Set
-
-import requests
-from license_expression import ExpressionError, Licensing
-from requests.compat import urljoin
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from itertools import count, islice
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+)
 
+from . import instrumentation
+from .cache import CacheEntry, DefinitionsCache
 from .dependencies import Dependency
+from .retry import RETRY_STATUS_CODES, RateLimiter, Retry, RetryPolicy
+
+# requests and license_expression take most of the startup time, so they are
+# only imported once they are needed.
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+
+DEFINITIONS_URL = "https://api.clearlydefined.io/definitions"
+
+#: Amount of coordinates that are sent to the bulk definitions endpoint in a
+#: single request.
+DEFAULT_CHUNK_SIZE = 100
 
-_LICENSING = Licensing()
+#: Amount of connections to ClearlyDefined that are kept alive.
+DEFAULT_POOL_SIZE = 4
 
+#: Amount of requests to ClearlyDefined that the asynchronous client keeps in
+#: flight at the same time.
+DEFAULT_CONCURRENCY = 100
 
-def clearlydefined_url(dependency: Dependency) -> str:
-    return urljoin(
-        "https://api.clearlydefined.io/definitions/maven/mavencentral/",
-        f"{dependency.groupid}/{dependency.artifactid}/{dependency.version}",
+#: Seconds to wait for ClearlyDefined before giving up on a request.
+DEFAULT_TIMEOUT = 30.0
+
+
+def clearlydefined_coordinates(dependency: Dependency) -> str:
+    return (
+        f"maven/mavencentral/"
+        f"{dependency.groupid}/{dependency.artifactid}/{dependency.version}"
     )
 
 
-def definitions_from_clearlydefined(dependency: Dependency) -> Dict:
+def clearlydefined_url(
+    dependency: Dependency, base_url: str = DEFINITIONS_URL
+) -> str:
+    return f"{base_url}/{clearlydefined_coordinates(dependency)}"
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BulkResult(NamedTuple):
+    """The outcome of requesting the definitions of a single dependency from
+    the bulk definitions endpoint.
+    """
+
+    dependency: Dependency
+    #: The definitions, or None if they were not in the response. They can
+    #: still be requested on their own.
+    definitions: Optional["ClearlyDefinedDefinitions"]
+    #: Retries of the bulk request, which are shared by all dependencies in
+    #: the chunk.
+    retries: List[Retry]
+    #: Why the bulk request failed even after retrying it, or None. The
+    #: definitions should not be requested on their own then, because those
+    #: requests would most likely fail as well.
+    error: Optional[str]
+
+
+class ClearlyDefinedClient:
+    """Client for the ClearlyDefined API. The client owns a
+    :class:`requests.Session`, so connections to ClearlyDefined are kept alive
+    and reused between lookups. A single client can be shared between threads;
+    *pool_size* should match the amount of threads that use it.
+
+    If a *cache* is given, definitions are looked up in the cache before they
+    are requested from ClearlyDefined.
+
+    Requests wait for the *rate_limiter*, and failed requests are retried
+    according to the *retry_policy*.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: DefinitionsCache = None,
+        base_url: str = DEFINITIONS_URL,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cache = cache
+        self.base_url = base_url
+        self.rate_limiter = (
+            rate_limiter if rate_limiter is not None else RateLimiter()
+        )
+        self.retry_policy = (
+            retry_policy if retry_policy is not None else RetryPolicy()
+        )
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> "requests.Session":
+        """The session is only created when the first request is made, so
+        that runs that make no requests never import requests.
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> "requests.Session":
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def _request(
+        self,
+        method: Callable,
+        url: str,
+        endpoint: str,
+        on_retry: Callable[[Retry], None] = None,
+        **kwargs,
+    ) -> "requests.Response":
+        """Call *method* (for instance ``self.session.get``) on *url*, retrying
+        it as long as the retry policy allows. Every retry is passed to
+        *on_retry*. Requests are timed under the name of *endpoint*.
+
+        :raises requests.RequestException: if the last attempt raised it.
+        """
+        import requests
+
+        for attempt in count():
+            self.rate_limiter.acquire()
+            try:
+                with instrumentation.timer(
+                    "clearlydefined.requests", endpoint=endpoint
+                ):
+                    response = method(url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as err:
+                instrumentation.count(
+                    "clearlydefined.responses", status="error"
+                )
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+                cause = str(err)
+                delay = self.retry_policy.delay(attempt)
+            else:
+                status_code = response.status_code
+                instrumentation.count(
+                    "clearlydefined.responses", status=str(status_code)
+                )
+                if not self.retry_policy.should_retry(attempt, status_code):
+                    return response
+                cause = status_code
+                delay = self.retry_policy.delay(
+                    attempt, response.headers.get("Retry-After")
+                )
+                if status_code == 429:
+                    self.rate_limiter.pause(delay)
+            instrumentation.count("clearlydefined.retries")
+            if on_retry is not None:
+                on_retry(Retry(url, attempt + 1, cause, delay))
+            time.sleep(delay)
+
+    def definitions(
+        self, dependency: Dependency, on_retry: Callable[[Retry], None] = None
+    ) -> Dict:
+        """
+        :raises requests.RequestException: if the request could not be made.
+        """
+        url = clearlydefined_url(dependency, self.base_url)
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            if entry is not None and entry.fresh:
+                return entry.json_dict
+
+        import requests
+
+        response = self._request(
+            self.session.get,
+            url,
+            "definitions",
+            on_retry=on_retry,
+            headers=_conditional_headers(entry),
+        )
+
+        if response.status_code == 304 and entry is not None:
+            instrumentation.count("cache.revalidated")
+            self.cache.refresh(url)
+            return entry.json_dict
+        if response.status_code == 200:
+            json_dict = json.loads(response.text)
+            _cache_definitions(
+                self.cache,
+                url,
+                json_dict,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+            return json_dict
+        raise requests.RequestException(
+            f"Status code of '{url}' was {response.status_code}"
+        )
+
+    def bulk_definitions(
+        self,
+        dependencies: Iterable[Dependency],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[Dependency, "ClearlyDefinedDefinitions"]:
+        """Retrieve the definitions of *dependencies* from the bulk definitions
+        endpoint of ClearlyDefined, *chunk_size* coordinates at a time.
+
+        Failures are handled per coordinate: dependencies whose definitions
+        could not be retrieved are simply absent from the returned mapping.
+        So are dependencies whose expired definitions in the cache can be
+        revalidated with :meth:`definitions`.
+        """
+        result = {}
+        for chunk in self.bulk_chunks(dependencies, chunk_size=chunk_size):
+            for item in chunk:
+                if item.definitions is not None:
+                    result[item.dependency] = item.definitions
+        return result
+
+    def bulk_chunks(
+        self,
+        dependencies: Iterable[Dependency],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[List[BulkResult]]:
+        """Like :meth:`bulk_definitions`, but yield a list of
+        :class:`BulkResult` for every chunk as soon as it is known. The next
+        chunk is only requested when the generator is resumed.
+
+        Dependencies with fresh definitions in the cache are yielded in chunks
+        of their own. So are dependencies whose expired definitions have
+        validators, but without definitions: the bulk endpoint does not
+        support conditional requests, so they are left to :meth:`definitions`
+        to revalidate.
+        """
+        hits = []
+        misses = []
+        for dependency in dependencies:
+            entry = self._cache_entry(dependency)
+            if entry is not None and (
+                entry.fresh or _conditional_headers(entry)
+            ):
+                definitions = None
+                if entry.fresh:
+                    definitions = ClearlyDefinedDefinitions(entry.json_dict)
+                hits.append(BulkResult(dependency, definitions, [], None))
+                if len(hits) >= chunk_size:
+                    yield hits
+                    hits = []
+            else:
+                misses.append(dependency)
+                if len(misses) >= chunk_size:
+                    yield self._bulk_chunk(misses)
+                    misses = []
+        if hits:
+            yield hits
+        if misses:
+            yield self._bulk_chunk(misses)
+
+    def _cache_entry(self, dependency: Dependency) -> Optional[CacheEntry]:
+        if self.cache is None:
+            return None
+        return self.cache.lookup(clearlydefined_url(dependency, self.base_url))
+
+    def _bulk_chunk(self, chunk: List[Dependency]) -> List[BulkResult]:
+        """Fetch the definitions of a single chunk of dependencies. If
+        ClearlyDefined rejects the chunk as a whole, it is split in half and
+        retried, so that a single bad coordinate cannot take the rest of the
+        chunk down with it.
+
+        If the request still fails after retrying it, or still gets a status
+        code that is worth retrying, the whole chunk failed.
+        """
+        import requests
+
+        coordinates = [
+            clearlydefined_coordinates(dependency) for dependency in chunk
+        ]
+        retries = []
+        try:
+            response = self._request(
+                self.session.post,
+                self.base_url,
+                "bulk",
+                on_retry=retries.append,
+                json=coordinates,
+            )
+        except requests.RequestException as err:
+            return _failed(chunk, retries, str(err))
+
+        status_code = response.status_code
+        if status_code in RETRY_STATUS_CODES:
+            return _failed(
+                chunk,
+                retries,
+                f"Status code of '{self.base_url}' was {status_code}",
+            )
+        if status_code != 200:
+            if 400 <= status_code < 500 and len(chunk) > 1:
+                middle = len(chunk) // 2
+                return [
+                    item._replace(retries=retries + item.retries)
+                    for item in self._bulk_chunk(chunk[:middle])
+                    + self._bulk_chunk(chunk[middle:])
+                ]
+            return _missing(chunk, retries)
+
+        try:
+            json_dict = json.loads(response.text)
+        except ValueError:
+            return _missing(chunk, retries)
+        if not isinstance(json_dict, dict):
+            return _missing(chunk, retries)
+
+        result = []
+        for dependency, coordinate in zip(chunk, coordinates):
+            definitions = json_dict.get(coordinate)
+            if not isinstance(definitions, dict):
+                result.append(BulkResult(dependency, None, retries, None))
+                continue
+            _cache_definitions(
+                self.cache,
+                clearlydefined_url(dependency, self.base_url),
+                definitions,
+            )
+            result.append(
+                BulkResult(
+                    dependency,
+                    ClearlyDefinedDefinitions(definitions),
+                    retries,
+                    None,
+                )
+            )
+        return result
+
+
+def _failed(
+    chunk: List[Dependency], retries: List[Retry], error: str
+) -> List[BulkResult]:
+    return [
+        BulkResult(dependency, None, retries, error) for dependency in chunk
+    ]
+
+
+def _missing(
+    chunk: List[Dependency], retries: List[Retry]
+) -> List[BulkResult]:
+    return [
+        BulkResult(dependency, None, retries, None) for dependency in chunk
+    ]
+
+
+def _cache_definitions(
+    cache: Optional[DefinitionsCache],
+    url: str,
+    json_dict: Dict,
+    etag: str = None,
+    last_modified: str = None,
+):
+    if cache is None:
+        return
+    definitions = ClearlyDefinedDefinitions(json_dict)
+    # Empty definitions are not cached, because ClearlyDefined fills them in
+    # after it has harvested the dependency.
+    if not definitions.is_empty():
+        cache.set(
+            url, definitions.as_dict(), etag=etag, last_modified=last_modified,
+        )
+
+
+def _conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+    """Return the headers that revalidate the cached *entry*."""
+    headers = {}
+    if entry is not None:
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+@lru_cache(maxsize=None)
+def _default_client() -> ClearlyDefinedClient:
+    return ClearlyDefinedClient()
+
+
+def definitions_from_clearlydefined(
+    dependency: Dependency,
+    client: ClearlyDefinedClient = None,
+    on_retry: Callable[[Retry], None] = None,
+) -> Dict:
     """
     :raises requests.RequestException: if the request could not be made.
     """
-    url = clearlydefined_url(dependency)
-    response = requests.get(url)
+    if client is None:
+        client = _default_client()
+    with instrumentation.timer("clearlydefined.definitions"):
+        return client.definitions(dependency, on_retry=on_retry)
+
+
+def bulk_definitions_from_clearlydefined(
+    dependencies: Iterable[Dependency],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    client: ClearlyDefinedClient = None,
+) -> Dict[Dependency, "ClearlyDefinedDefinitions"]:
+    """See :meth:`ClearlyDefinedClient.bulk_definitions`."""
+    if client is None:
+        client = _default_client()
+    return client.bulk_definitions(dependencies, chunk_size=chunk_size)
+
+
+def bulk_chunks_from_clearlydefined(
+    dependencies: Iterable[Dependency],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    client: ClearlyDefinedClient = None,
+) -> Iterator[List[BulkResult]]:
+    """See :meth:`ClearlyDefinedClient.bulk_chunks`."""
+    if client is None:
+        client = _default_client()
+    return client.bulk_chunks(dependencies, chunk_size=chunk_size)
+
+
+#: Amount of distinct license expressions whose license keys are remembered.
+LICENSE_KEYS_CACHE_SIZE = 4096
+
+_LICENSE_OPERATORS = frozenset({"WITH", "with", "AND", "and", "OR", "or"})
+_LICENSE_TOKEN = re.compile(r"[^\s()]+")
+
+
+@lru_cache(maxsize=None)
+def _licensing():
+    """Return the Licensing that parses license expressions. It is built on
+    first use, because building it is slow.
+    """
+    from license_expression import Licensing
+
+    return Licensing()
+
+
+@lru_cache(maxsize=LICENSE_KEYS_CACHE_SIZE)
+def license_keys(expression: str) -> FrozenSet[str]:
+    """Return the keys of the licenses in the license *expression*. If the
+    expression cannot be parsed, it is naively split into licenses instead.
+
+    The same few expressions occur over and over again across dependencies, so
+    the results are cached.
+    """
+    from license_expression import ExpressionError
+
+    licensing = _licensing()
+    try:
+        parsed = licensing.parse(expression)
+        return frozenset(licensing.license_keys(parsed))
+    except ExpressionError:
+        return frozenset(
+            token
+            for token in _LICENSE_TOKEN.findall(expression)
+            if token not in _LICENSE_OPERATORS
+        )
 
-    if response.status_code == 200:
-        return json.loads(response.text)
-    raise requests.RequestException(
-        f"Status code of '{url}' was {response.status_code}"
-    )
+
+_MISSING = object()
+
+
+def _lookup(json_dict: Dict, *keys: str):
+    """Return ``json_dict[key1][key2]...``, or :data:`_MISSING` if that does
+    not exist.
+    """
+    for key in keys:
+        try:
+            json_dict = json_dict[key]
+        except (KeyError, TypeError):
+            return _MISSING
+    return json_dict
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
 
 
 class ClearlyDefinedDefinitions:
+    """The parts of the ClearlyDefined definitions of a dependency that the
+    checks need. They are extracted from *json_dict* once, and the rest of it
+    (files, hashes, attributions, ...) is not kept around.
+    """
+
+    __slots__ = ("_declared", "_discovered", "_licenses", "_score", "_sha1")
+
     def __init__(self, json_dict: Dict):
-        self._json_dict = json_dict
+        self._declared = _intern(_lookup(json_dict, "licensed", "declared"))
+        self._sha1 = _lookup(json_dict, "described", "hashes", "sha1")
+        self._score = _lookup(json_dict, "scores", "effective")
+
+        discovered = set()
+        facets = _lookup(json_dict, "licensed", "facets")
+        if isinstance(facets, dict):
+            for facet in facets.values():
+                expressions = _lookup(facet, "discovered", "expressions")
+                if expressions is not _MISSING:
+                    discovered.update(map(_intern, expressions))
+        self._discovered = frozenset(discovered)
+        self._licenses = None
+
+    def as_dict(self) -> Dict:
+        """Return the definitions as a dictionary that can be serialised to
+        JSON. It has the same structure as a ClearlyDefined response, but only
+        contains the parts that the checks need.
+        """
+        result = {}
+        if self._sha1 is not _MISSING:
+            result["described"] = {"hashes": {"sha1": self._sha1}}
+        licensed = {}
+        if self._declared is not _MISSING:
+            licensed["declared"] = self._declared
+        if self._discovered:
+            licensed["facets"] = {
+                "core": {
+                    "discovered": {"expressions": sorted(self._discovered)}
+                }
+            }
+        if licensed:
+            result["licensed"] = licensed
+        if self._score is not _MISSING:
+            result["scores"] = {"effective": self._score}
+        return result
+
+    def __reduce__(self):
+        # Rebuild the definitions from their dictionary, so that missing parts
+        # are :data:`_MISSING` again in the process that unpickles them.
+        return (type(self), (self.as_dict(),))
 
     def is_empty(self) -> bool:
         """ClearlyDefined sometimes returns empty definitions. This method
         does a naive check to verify for that.
         """
-        try:
-            self._json_dict["described"]["hashes"]["sha1"]
-            return False
-        except KeyError:
-            return True
+        return self._sha1 is _MISSING
 
     @property
     def discovered_license_expressions(self) -> Set[str]:
-        result = set()
-
-        with suppress(KeyError):
-            result = result.union({self._json_dict["licensed"]["declared"]})
-
-        try:
-            facets = self._json_dict["licensed"]["facets"].values()
-        except KeyError:
-            return result
-
-        for facet in facets:
-            with suppress(KeyError):
-                result = result.union(set(facet["discovered"]["expressions"]))
-
+        result = set(self._discovered)
+        if self._declared is not _MISSING:
+            result.add(self._declared)
         return result
 
     @property
     def discovered_licenses(self) -> Set[str]:
-        result = set()
-        expressions = self.discovered_license_expressions
-        for expression in expressions:
-            try:
-                parsed = _LICENSING.parse(expression)
-                licenses = _LICENSING.license_keys(parsed)
-            except ExpressionError:
-                mapping = {
-                    "WITH": " ",
-                    "with": " ",
-                    "AND": " ",
-                    "and": " ",
-                    "OR": " ",
-                    "or": " ",
-                    "(": " ",
-                    ")": " ",
-                }
-                for key, val in mapping.items():
-                    expression = expression.replace(key, val)
-                licenses = expression.split()
-            for lic in licenses:
-                result.add(lic)
-        return result
+        if self._licenses is None:
+            with instrumentation.timer("licenses"):
+                licenses = set()
+                for expression in self.discovered_license_expressions:
+                    licenses.update(license_keys(expression))
+                self._licenses = frozenset(licenses)
+        return set(self._licenses)
 
     @property
     def score(self) -> int:
-        return self._json_dict["scores"]["effective"]
+        """
+        :raises KeyError: if the definitions do not contain a score.
+        """
+        if self._score is _MISSING:
+            raise KeyError("scores")
+        return self._score
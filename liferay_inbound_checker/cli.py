@@ -7,81 +7,401 @@
 """Console script for liferay_inbound_checker."""
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
+from functools import partial
 from inspect import cleandoc
-from multiprocessing.pool import ThreadPool
+from itertools import islice
+from pathlib import Path
 
 import click
-from requests import RequestException
 
-from liferay_inbound_checker import cwd
-from liferay_inbound_checker.check import check, is_whitelisted, load_whitelist
+from liferay_inbound_checker import instrumentation
+from liferay_inbound_checker.boms import BomStore
+from liferay_inbound_checker.cache import DefinitionsCache, default_cache_dir
+from liferay_inbound_checker.check import (
+    Result,
+    Whitelist,
+    check,
+    is_whitelisted,
+    load_whitelist,
+    request_failed,
+)
 from liferay_inbound_checker.clearlydefined import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_TIMEOUT,
+    DEFINITIONS_URL,
+    BulkResult,
+    ClearlyDefinedClient,
     ClearlyDefinedDefinitions,
+    bulk_chunks_from_clearlydefined,
     definitions_from_clearlydefined,
 )
 from liferay_inbound_checker.dependencies import (
-    convert_to_tree,
-    dependencies_from_tree,
-    generate_pom,
-    get_current_revision,
+    generate_pom_file,
+    iter_dependencies,
+    pom_inputs_digest,
+    resolve_revision,
+    revision_pom_inputs_digest,
+    worktree,
+)
+from liferay_inbound_checker.metrics import write_metrics
+from liferay_inbound_checker.pools import (
+    MAX_WORKERS,
+    SAMPLE_SIZE,
+    available_cpus,
+    check_in_processes,
+    optimal_workers,
+    timed,
 )
+from liferay_inbound_checker.results import ResultCache, policy_digest
+from liferay_inbound_checker.retry import (
+    DEFAULT_RETRIES,
+    RateLimiter,
+    RetryPolicy,
+)
+
+#: Amount of threads that check dependencies concurrently.
+WORKERS = 4
+
+
+class WorkersType(click.ParamType):
+    """A positive amount of workers, or 'auto', which is converted to None."""
+
+    name = "integer|auto"
 
+    def convert(self, value, param, ctx):
+        if value is None or value == "auto":
+            return None
+        try:
+            workers = int(value)
+        except (TypeError, ValueError):
+            workers = 0
+        if workers < 1:
+            self.fail(f"{value!r} is not a positive integer or 'auto'.")
+        return workers
 
-def generate_dependencies(portal_path):
+
+def _process_error(err: subprocess.CalledProcessError) -> str:
+    """Return the standard error of the failed process of *err*, or a
+    description of *err* if its standard error was not captured.
+    """
+    if not err.stderr:
+        return str(err)
+    return err.stderr.decode("utf-8", "replace").strip()
+
+
+def generate_dependencies(portal_path, cache_dir=None, force=False):
+    """Generate the POM of *portal_path* and return an iterator that lazily
+    parses the dependencies from it.
+    """
     click.echo("Generating list of dependencies.")
-    pom_xml = generate_pom(portal_path)
-    root = convert_to_tree(pom_xml)
-    dependencies = dependencies_from_tree(root)
+    try:
+        with instrumentation.timer("phase", phase="generate_pom"):
+            pom_path = generate_pom_file(
+                portal_path, cache_dir=cache_dir, force=force
+            )
+    except subprocess.CalledProcessError as err:
+        error = _process_error(err)
+        raise click.ClickException(
+            f"Could not generate the list of dependencies: {error}"
+        )
     click.echo("Success!")
-    return dependencies
+    return instrumentation.timed_iter(
+        "phase", iter_dependencies(pom_path), phase="parse_pom"
+    )
 
 
 def load_whitelist_cli(portal_path):
     click.echo("Loading whitelist.")
     try:
-        whitelist = load_whitelist(
-            f"{portal_path}/inbound_licensing_whitelist.yml"
-        )
+        with instrumentation.timer("phase", phase="load_whitelist"):
+            whitelist = load_whitelist(
+                f"{portal_path}/inbound_licensing_whitelist.yml"
+            )
     except FileNotFoundError:
-        whitelist = []
+        whitelist = Whitelist()
         click.echo("Could not find whitelist.")
     else:
+        for error in whitelist.errors:
+            click.echo(f"Skipping malformed whitelist entry: {error}")
         click.echo("Success!")
+    return whitelist
 
 
-def check_dependencies(dependencies, whitelist):
-    click.echo()
-    click.echo("Evaluating dependencies for their licensing.")
+def _check_concurrently(
+    dependencies, whitelist, prefetched, client, concurrency
+):
+    try:
+        from liferay_inbound_checker.aio import check_concurrently
+    except ImportError:
+        raise click.ClickException(
+            "The async backend requires aiohttp. Install it with "
+            "'pip install liferay_inbound_checker[async]'."
+        )
+    return check_concurrently(
+        dependencies,
+        whitelist,
+        prefetched,
+        concurrency=concurrency,
+        timeout=client.timeout,
+        cache=client.cache,
+        base_url=client.base_url,
+        rate_limiter=client.rate_limiter,
+        retry_policy=client.retry_policy,
+    )
 
-    success = True
 
-    pool = ThreadPool(4)
-    multiple_results = [
-        pool.apply_async(check, (dependency, whitelist))
-        for dependency in dependencies
-    ]
+def _check_item(item, **kwargs):
+    """Check *item*, unless it already is a result."""
+    if isinstance(item, Result):
+        return item
+    return check(item, **kwargs)
 
-    calculated_results = []
 
-    for result in multiple_results:
-        result = result.get()
-        calculated_results.append(result)
+def _results(
+    items, whitelist, prefetched, client, backend, concurrency, workers
+):
+    """Check the dependencies in *items* concurrently, and yield the results
+    in the order in which they complete. Results in *items* are passed on as
+    they are. If *workers* is None, the first few items are checked one by one
+    to decide on the amount of workers.
+    """
+    if backend == "async":
+        dependencies = []
+        for item in items:
+            if isinstance(item, Result):
+                yield item
+            else:
+                dependencies.append(item)
+        yield from _check_concurrently(
+            dependencies, whitelist, prefetched, client, concurrency
+        )
+        return
+
+    check_one = partial(
+        _check_item, whitelist=whitelist, prefetched=prefetched, client=client
+    )
+    if workers is None:
+        items = iter(items)
+        wall_time = cpu_time = 0.0
+        for item in islice(items, SAMPLE_SIZE):
+            result, wall, cpu = timed(check_one, item)
+            wall_time += wall
+            cpu_time += cpu
+            yield result
+        # Threads share a single processor because of the GIL.
+        cpus = available_cpus() if backend == "process" else 1
+        workers = optimal_workers(wall_time, cpu_time, cpus=cpus)
         click.echo()
-        click.echo(result.dependency)
-        if not result.success:
-            success = False
-            for reason in result.reasons:
-                click.echo(reason)
+        click.echo(f"Tuned the amount of workers to {workers}.")
+
+    if backend == "process":
+        yield from check_in_processes(
+            items, whitelist, prefetched, client, workers
+        )
+        return
+    from multiprocessing.pool import ThreadPool
+
+    with ThreadPool(workers) as pool:
+        yield from pool.imap_unordered(check_one, items)
+
+
+def echo_result(result):
+    click.echo()
+    click.echo(result.dependency)
+    if not result.success:
+        for reason in result.reasons:
+            click.echo(reason)
+    else:
+        # TODO: Reword this.
+        click.echo("Succeeded! If necessary, manually verify this result.")
+
+
+def check_dependencies(
+    dependencies,
+    whitelist,
+    client=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    backend="thread",
+    concurrency=DEFAULT_CONCURRENCY,
+    result_cache=None,
+    grouped=False,
+    max_failures=None,
+    workers=WORKERS,
+    reports=(),
+):
+    """Check *dependencies* and print the results as they complete. If
+    *grouped* is true, print the results at the end instead, failures first
+    and sorted by dependency. If *max_failures* is given, stop checking and
+    requesting definitions after that many failures. If *workers* is None,
+    tune the amount of workers automatically. Every result is also written to
+    each of *reports*. Return whether all dependencies succeeded.
+    """
+    if whitelist is None:
+        whitelist = Whitelist()
+    if client is None:
+        client = ClearlyDefinedClient(pool_size=WORKERS)
+    policy = policy_digest(whitelist)
+    dependencies = iter(dependencies)
+    # Amount of dependencies that were taken from *dependencies*.
+    taken = 0
+    # Cached results and whitelisted dependencies, which need no definitions.
+    ready = deque()
+    prefetched = {}
+    # Retries of bulk requests, by dependency. The dependencies in a chunk
+    # share the same retries.
+    bulk_retries = {}
+    # The pools take items as fast as they can, regardless of how many
+    # workers are free. Items therefore take a slot of this window, and their
+    # results give it back, so that the definitions of the next chunk are
+    # only requested once about a chunk of items is left to check. The async
+    # backend collects all dependencies before it checks any of them.
+    window = None
+    if backend != "async":
+        window = threading.Semaphore(chunk_size + (workers or MAX_WORKERS))
+    stopped = threading.Event()
+
+    def not_whitelisted():
+        # The dependencies may be parsed lazily, so the first definitions are
+        # requested while the rest of the dependencies are still being parsed.
+        nonlocal taken
+        for dependency in dependencies:
+            taken += 1
+            if result_cache is not None:
+                result = result_cache.get(dependency, policy)
+                if result is not None:
+                    ready.append(result)
+                    continue
+            if is_whitelisted(dependency, whitelist):
+                ready.append(dependency)
+            else:
+                yield dependency
+
+    def bounded(items):
+        # Taking the next item may request the next chunk, so a slot is
+        # acquired first.
+        items = iter(items)
+        while True:
+            window.acquire()
+            if stopped.is_set():
+                return
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            yield item
+
+    def items():
+        # Every chunk is checked as soon as its definitions arrive, and the
+        # next chunk is only requested when there is room in the window.
+        # Stopping the run therefore stops the requests as well.
+        if backend == "async":
+            # The async backend keeps many requests for single definitions in
+            # flight, instead of waiting for one bulk request at a time.
+            chunks = (
+                [BulkResult(dependency, None, [], None)]
+                for dependency in not_whitelisted()
+            )
         else:
-            # TODO: Reword this.
-            click.echo("Succeeded! If necessary, manually verify this result.")
+            chunks = bulk_chunks_from_clearlydefined(
+                not_whitelisted(), chunk_size=chunk_size, client=client,
+            )
+        # This includes the time spent parsing dependencies.
+        for chunk in instrumentation.timed_iter(
+            "phase", chunks, phase="prefetch"
+        ):
+            while ready:
+                yield ready.popleft()
+            for item in chunk:
+                if item.retries:
+                    bulk_retries[item.dependency] = item.retries
+                if item.error is not None:
+                    # Requesting the definitions one by one would most likely
+                    # fail as well.
+                    yield request_failed(item.dependency, item.error)
+                    continue
+                if item.definitions is not None:
+                    prefetched[item.dependency] = item.definitions
+                yield item.dependency
+        while ready:
+            yield ready.popleft()
+
+    click.echo()
+    click.echo(
+        "Retrieving definitions from ClearlyDefined and evaluating"
+        " dependencies for their licensing."
+    )
+
+    successes = failures = retries = cached = 0
+    held_results = []
+
+    results = _results(
+        items() if window is None else bounded(items()),
+        whitelist,
+        prefetched,
+        client,
+        backend,
+        concurrency,
+        workers,
+    )
+    with instrumentation.timer("phase", phase="check"):
+        try:
+            for result in results:
+                if window is not None:
+                    window.release()
+                retries += len(result.retries)
+                result.retries[:0] = bulk_retries.get(result.dependency, [])
+                if result.cached:
+                    cached += 1
+                elif result_cache is not None:
+                    result_cache.set(result, policy)
+                if result.success:
+                    successes += 1
+                else:
+                    failures += 1
+                _count_result(result)
+                for report in reports:
+                    report.write(result)
+                if grouped:
+                    held_results.append(result)
+                else:
+                    echo_result(result)
+                if max_failures is not None and failures >= max_failures:
+                    break
+        finally:
+            if window is not None:
+                # Wake up the pool if it waits for a slot, because closing the
+                # pool waits for it.
+                stopped.set()
+                window.release()
+            # Cancel the lookups that are still pending.
+            results.close()
 
-    failures = sum(1 for result in calculated_results if not result.success)
-    successes = len(calculated_results) - failures
+    for result in sorted(
+        held_results, key=lambda result: (result.success, result.dependency)
+    ):
+        echo_result(result)
+
+    success = not failures
 
     click.echo()
     click.echo(f"Successful dependencies: {successes}")
     click.echo(f"Failed dependencies: {failures}")
+    # Dependencies that were not taken yet are only counted, not checked.
+    unchecked = taken + sum(1 for _ in dependencies) - successes - failures
+    if unchecked:
+        click.echo(f"Unchecked dependencies: {unchecked}")
+    # Retries of a bulk request are only counted once.
+    retries += len(
+        {id(retry) for shared in bulk_retries.values() for retry in shared}
+    )
+    if retries:
+        click.echo(f"Retried requests: {retries}")
+    if cached:
+        click.echo(f"Results from cache: {cached}")
 
     if not success:
         click.echo()
@@ -95,39 +415,443 @@ def check_dependencies(dependencies, whitelist):
     return success
 
 
+def _profile(ctx, profiler, path):
+    """Run *profiler* until *ctx* closes, and then write its profile to
+    *path*.
+    """
+    profiler.start()
+
+    def finish():
+        profiler.stop()
+        profiler.write(path)
+
+    ctx.call_on_close(finish)
+
+
+def _count_result(result: Result):
+    instrumentation.count(
+        "results", outcome="success" if result.success else "failure"
+    )
+    for reason in result.reasons:
+        instrumentation.count("reasons", reason=type(reason).__name__)
+
+
+def _collect_measurements(ctx, timings=False, metrics_file=None):
+    """Collect measurements. When *ctx* closes, print a summary of them if
+    *timings* is set, and write them to *metrics_file* if it is given.
+    """
+    instrumentation.enable()
+    started = time.perf_counter()
+
+    def finish():
+        instrumentation.record(
+            "phase", time.perf_counter() - started, phase="total"
+        )
+        if timings:
+            click.echo()
+            for line in instrumentation.format_summary():
+                click.echo(line)
+        if metrics_file:
+            write_metrics(metrics_file)
+
+    ctx.call_on_close(finish)
+
+
 @click.group()
-def main():
-    pass
+@click.option(
+    "--chunk-size",
+    default=DEFAULT_CHUNK_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help=(
+        "Amount of dependencies per bulk request to ClearlyDefined. The async"
+        " backend makes no bulk requests."
+    ),
+)
+@click.option(
+    "--timeout",
+    default=DEFAULT_TIMEOUT,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Seconds to wait for a response from ClearlyDefined.",
+)
+@click.option(
+    "--cache-dir",
+    default=str(default_cache_dir()),
+    show_default=True,
+    type=click.Path(file_okay=False),
+    help=(
+        "Directory in which ClearlyDefined definitions, generated POMs and the"
+        " dependencies of base revisions are cached."
+    ),
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not cache ClearlyDefined definitions and results of checks.",
+)
+@click.option(
+    "--force-regenerate",
+    is_flag=True,
+    help=(
+        "Run Gradle to generate the POM even if it or the dependencies of the"
+        " base revision are cached."
+    ),
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["thread", "process", "async"]),
+    default="thread",
+    show_default=True,
+    envvar="LIFERAY_INBOUND_CHECKER_BACKEND",
+    show_envvar=True,
+    help="How to check dependencies concurrently.",
+)
+@click.option(
+    "--workers",
+    default=str(WORKERS),
+    show_default=True,
+    type=WorkersType(),
+    envvar="LIFERAY_INBOUND_CHECKER_WORKERS",
+    show_envvar=True,
+    help=(
+        "Amount of threads or processes that check dependencies, or 'auto'"
+        " to pick it from the measured latency."
+    ),
+)
+@click.option(
+    "--concurrency",
+    default=DEFAULT_CONCURRENCY,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Amount of requests in flight with the async backend.",
+)
+@click.option(
+    "--grouped",
+    is_flag=True,
+    help=(
+        "Print the results at the end, failures first and sorted by"
+        " dependency, instead of as they complete."
+    ),
+)
+@click.option(
+    "--fail-fast",
+    is_flag=True,
+    help="Stop checking dependencies after the first failure.",
+)
+@click.option(
+    "--max-failures",
+    type=click.IntRange(min=1),
+    help="Stop checking dependencies after this many failures.",
+)
+@click.option(
+    "--jsonl",
+    metavar="PATH",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write a JSON object per result to every line of PATH.",
+)
+@click.option(
+    "--junit-xml",
+    metavar="PATH",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write a JUnit XML report of the results to PATH.",
+)
+@click.option(
+    "--timings",
+    is_flag=True,
+    help="Print how long every phase and request took at the end.",
+)
+@click.option(
+    "--metrics-file",
+    metavar="PATH",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write metrics of the run to PATH in the Prometheus text format.",
+)
+@click.option(
+    "--profile",
+    metavar="PATH",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Profile the run, including its worker threads, and write the"
+    " profile to PATH.",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(["collapsed", "pstats"]),
+    default="pstats",
+    show_default=True,
+    help="Write a pstats file, or collapsed stacks for flame graphs.",
+)
+@click.option(
+    "--api-url",
+    default=DEFINITIONS_URL,
+    show_default=True,
+    help="URL of the definitions endpoint of the ClearlyDefined API.",
+)
+@click.option(
+    "--rate-limit",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Maximum requests per second to ClearlyDefined, or 0 for no limit.",
+)
+@click.option(
+    "--retries",
+    default=DEFAULT_RETRIES,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Times to retry a failed request to ClearlyDefined.",
+)
+@click.option(
+    "--offline",
+    metavar="SNAPSHOT",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Serve definitions from SNAPSHOT instead of ClearlyDefined.",
+)
+@click.pass_context
+def main(
+    ctx,
+    chunk_size,
+    timeout,
+    cache_dir,
+    no_cache,
+    force_regenerate,
+    backend,
+    workers,
+    concurrency,
+    grouped,
+    fail_fast,
+    max_failures,
+    jsonl,
+    junit_xml,
+    timings,
+    metrics_file,
+    profile,
+    profile_format,
+    api_url,
+    rate_limit,
+    retries,
+    offline,
+):
+    ctx.ensure_object(dict)
+    if profile:
+        from liferay_inbound_checker.profiling import PROFILERS
+
+        _profile(ctx, PROFILERS[profile_format](), profile)
+    if timings or metrics_file:
+        _collect_measurements(ctx, timings, metrics_file)
+    ctx.obj["chunk_size"] = chunk_size
+    ctx.obj["backend"] = backend
+    ctx.obj["workers"] = workers
+    ctx.obj["concurrency"] = concurrency
+    ctx.obj["grouped"] = grouped
+    if fail_fast:
+        max_failures = 1
+    ctx.obj["max_failures"] = max_failures
+    ctx.obj["reports"] = []
+    if jsonl or junit_xml:
+        from liferay_inbound_checker.reports import (
+            JsonLinesReport,
+            JUnitXmlReport,
+        )
+
+        for report_cls, path in (
+            (JsonLinesReport, jsonl),
+            (JUnitXmlReport, junit_xml),
+        ):
+            if path:
+                report = report_cls(path)
+                ctx.call_on_close(report.close)
+                ctx.obj["reports"].append(report)
+    ctx.obj["pom_options"] = {
+        "cache_dir": Path(cache_dir) / "poms",
+        "force": force_regenerate,
+    }
+    ctx.obj["bom_store"] = BomStore(Path(cache_dir) / "boms")
+    ctx.obj["result_cache"] = None
+    if offline:
+        if backend != "thread":
+            raise click.UsageError(
+                f"--offline cannot be combined with --backend {backend}."
+            )
+        from liferay_inbound_checker.snapshot import OfflineClient, Snapshot
+
+        client = OfflineClient(Snapshot(offline))
+        ctx.call_on_close(client.close)
+        ctx.obj["client"] = client
+        return
+
+    cache = None
+    if not no_cache:
+        cache = DefinitionsCache(cache_dir)
+        ctx.call_on_close(cache.close)
+        result_cache = ResultCache(cache_dir)
+        ctx.call_on_close(result_cache.close)
+        ctx.obj["result_cache"] = result_cache
+    client = ClearlyDefinedClient(
+        pool_size=workers or MAX_WORKERS,
+        timeout=timeout,
+        cache=cache,
+        base_url=api_url,
+        rate_limiter=RateLimiter(rate_limit),
+        retry_policy=RetryPolicy(retries),
+    )
+    ctx.call_on_close(client.close)
+    ctx.obj["client"] = client
 
 
 @main.command()
 @click.argument("portal_path")
-def all_dependencies(portal_path):
-    dependencies = generate_dependencies(portal_path)
+@click.pass_context
+def all_dependencies(ctx, portal_path):
+    dependencies = generate_dependencies(portal_path, **ctx.obj["pom_options"])
 
     whitelist = load_whitelist_cli(portal_path)
 
-    return check_dependencies(dependencies, whitelist)
+    success = check_dependencies(
+        dependencies,
+        whitelist,
+        client=ctx.obj["client"],
+        chunk_size=ctx.obj["chunk_size"],
+        backend=ctx.obj["backend"],
+        concurrency=ctx.obj["concurrency"],
+        result_cache=ctx.obj["result_cache"],
+        grouped=ctx.obj["grouped"],
+        max_failures=ctx.obj["max_failures"],
+        workers=ctx.obj["workers"],
+        reports=ctx.obj["reports"],
+    )
+    if not success:
+        ctx.exit(1)
+
+
+def base_dependencies(portal_path, base_ref, cache_dir=None, force=False):
+    """Generate the POM of *base_ref* of *portal_path* in a separate worktree,
+    and return the set of dependencies in it.
+    """
+    with worktree(portal_path, base_ref) as directory:
+        pom_path = generate_pom_file(
+            directory, cache_dir=cache_dir, force=force
+        )
+        return set(iter_dependencies(pom_path))
+
+
+def changed_dependencies(ctx, portal_path, base_ref, base_sha):
+    """Return the dependencies of *portal_path* that are not in *base_sha*."""
+    bom_store = ctx.obj["bom_store"]
+    pom_options = ctx.obj["pom_options"]
+    old_dependencies = None
+    if not pom_options["force"]:
+        old_dependencies = bom_store.get(base_sha)
+    if old_dependencies is not None:
+        click.echo(f"Using stored dependencies of {base_ref} ({base_sha}).")
+
+    from multiprocessing.pool import ThreadPool
+
+    # The POM of the base revision is generated in a separate worktree while
+    # the POM of the working copy is generated.
+    with ThreadPool(1) as pool:
+        old_result = None
+        if old_dependencies is None:
+            old_result = pool.apply_async(
+                base_dependencies, (portal_path, base_sha), pom_options
+            )
+        new_dependencies = set(
+            generate_dependencies(portal_path, **pom_options)
+        )
+        if old_result is not None:
+            try:
+                old_dependencies = old_result.get()
+            except subprocess.CalledProcessError as err:
+                raise click.ClickException(
+                    f"Could not generate the list of dependencies of"
+                    f" '{base_ref}': {_process_error(err)}"
+                )
+            bom_store.set(base_sha, old_dependencies)
+
+    return new_dependencies - old_dependencies
+
+
+def same_pom_inputs(portal_path, base_sha):
+    """Whether the inputs of the POM of *portal_path* are the same as those of
+    commit *base_sha*, in which case the dependencies are the same as well.
+    """
+    try:
+        base_digest = revision_pom_inputs_digest(portal_path, base_sha)
+    except subprocess.CalledProcessError:
+        return False
+    return base_digest == pom_inputs_digest(portal_path)
 
 
 @main.command()
 @click.argument("portal_path")
-def delta_dependencies(portal_path):
-    new_dependencies = set(generate_dependencies(portal_path))
-
-    # TODO: get old_dependencies
-    current_revision = get_current_revision(portal_path)
-    with cwd(portal_path):
-        subprocess.run(["git", "checkout", "master"])
-    old_dependencies = set(generate_dependencies(portal_path))
-    with cwd(portal_path):
-        subprocess.run(["git", "checkout", current_revision])
+@click.option(
+    "--base-ref",
+    default="master",
+    show_default=True,
+    help="Git revision whose dependencies are not checked again.",
+)
+@click.pass_context
+def delta_dependencies(ctx, portal_path, base_ref):
+    """Check the dependencies that are not in BASE_REF."""
+    try:
+        base_sha = resolve_revision(portal_path, base_ref)
+    except subprocess.CalledProcessError:
+        raise click.ClickException(f"'{base_ref}' is not a commit.")
 
-    dependencies = new_dependencies - old_dependencies
+    if not ctx.obj["pom_options"]["force"] and same_pom_inputs(
+        portal_path, base_sha
+    ):
+        # Neither the base revision nor the working copy need to be checked
+        # out or built.
+        click.echo(f"The dependencies have not changed since {base_ref}.")
+        dependencies = set()
+    else:
+        dependencies = changed_dependencies(
+            ctx, portal_path, base_ref, base_sha
+        )
 
     whitelist = load_whitelist_cli(portal_path)
 
-    return check_dependencies(dependencies, whitelist)
+    success = check_dependencies(
+        dependencies,
+        whitelist,
+        client=ctx.obj["client"],
+        chunk_size=ctx.obj["chunk_size"],
+        backend=ctx.obj["backend"],
+        concurrency=ctx.obj["concurrency"],
+        result_cache=ctx.obj["result_cache"],
+        grouped=ctx.obj["grouped"],
+        max_failures=ctx.obj["max_failures"],
+        workers=ctx.obj["workers"],
+        reports=ctx.obj["reports"],
+    )
+    if not success:
+        ctx.exit(1)
+
+
+@main.command()
+@click.argument("portal_path")
+@click.argument("snapshot_path", type=click.Path(dir_okay=False))
+@click.pass_context
+def export_snapshot(ctx, portal_path, snapshot_path):
+    """Write the definitions of all dependencies to a snapshot, for use with
+    --offline.
+    """
+    from liferay_inbound_checker import snapshot
+
+    dependencies = generate_dependencies(portal_path, **ctx.obj["pom_options"])
+
+    click.echo()
+    click.echo("Retrieving definitions from ClearlyDefined.")
+    missing = snapshot.export_snapshot(
+        snapshot_path,
+        dependencies,
+        ctx.obj["client"],
+        chunk_size=ctx.obj["chunk_size"],
+    )
+    for dependency in missing:
+        click.echo(f"Could not retrieve definitions of {dependency}.")
+    click.echo(f"Wrote snapshot to {snapshot_path}.")
 
 
 if __name__ == "__main__":
@@ -4,14 +4,19 @@
 
 """Interactions with dependencies."""
 
+import hashlib
+import os
+import shutil
 import subprocess
+import tempfile
+from contextlib import contextmanager
 from copy import copy
 from os import PathLike
 from pathlib import Path
-from typing import List, NamedTuple
-from xml.etree.ElementTree import Element, fromstring
+from typing import IO, Iterable, Iterator, List, NamedTuple, Tuple, Union
+from xml.etree.ElementTree import Element, fromstring, iterparse
 
-from . import cwd
+from . import atomic_write, cwd, instrumentation
 
 
 class Dependency(NamedTuple):
@@ -25,18 +30,155 @@ class Dependency(NamedTuple):
         return f"{self.groupid}/{self.artifactid}@{self.version}"
 
 
-def generate_pom(portal_directory: PathLike) -> str:
-    """Generate the POM of dependencies of *portal_directory* and return the POM
-    as a string.
+#: Path of the generated POM of dependencies, relative to the Portal directory.
+POM_PATH = "modules/build/release.portal.bom.third.party-unspecified.pom"
+
+#: Path of the elements that hold a single dependency, below the root element.
+_DEPENDENCY_PATH = ["dependencyManagement", "dependencies", "dependency"]
+_DEPENDENCY_FIELDS = frozenset({"groupId", "artifactId", "version"})
+
+
+#: Names of the files in the modules directory that determine the POM.
+POM_INPUTS = frozenset(
+    {"build.gradle", "releng.gradle", "settings.gradle", "gradle.properties"}
+)
+
+#: Directories that are not searched for inputs of the POM.
+_IGNORED_DIRECTORIES = frozenset(
+    {".git", ".gradle", "build", "classes", "node_modules", "tmp"}
+)
+
+
+def _digest(inputs: Iterable[Tuple[str, bytes]]) -> str:
+    digest = hashlib.sha256()
+    for path, contents in inputs:
+        digest.update(f"{path}\0{len(contents)}\0".encode("utf-8"))
+        digest.update(contents)
+    return digest.hexdigest()
+
+
+def pom_inputs_digest(portal_directory: PathLike) -> str:
+    """Return a hash of the contents of the files in the modules directory of
+    *portal_directory* that determine the generated POM. If the hash has not
+    changed, neither has the POM.
     """
+    modules = Path(portal_directory) / "modules"
 
-    with cwd(f"{portal_directory}/modules"):
-        subprocess.run(
-            ["../gradlew", "-b", "releng.gradle", "generatePomThirdParty"]
-        )
-    return (
-        Path(portal_directory)
-        / "modules/build/release.portal.bom.third.party-unspecified.pom"
+    def inputs():
+        for root, directories, files in os.walk(modules):
+            directories[:] = sorted(
+                directory
+                for directory in directories
+                if directory not in _IGNORED_DIRECTORIES
+            )
+            for name in sorted(files):
+                if name not in POM_INPUTS:
+                    continue
+                path = Path(root) / name
+                yield path.relative_to(modules).as_posix(), path.read_bytes()
+
+    return _digest(inputs())
+
+
+def _walk_order(path: str) -> List[Tuple[int, str]]:
+    # os.walk visits the files of a directory before its subdirectories.
+    *directories, name = path.split("/")
+    return [(1, directory) for directory in directories] + [(0, name)]
+
+
+def revision_pom_inputs_digest(portal_directory: PathLike, ref: str) -> str:
+    """Return the :func:`pom_inputs_digest` of commit *ref* of the Git
+    repository in *portal_directory*, without checking out the commit.
+
+    :raises subprocess.CalledProcessError: if *ref* does not exist or has no
+        modules directory.
+    """
+    listing = subprocess.run(
+        ["git", "ls-tree", "-r", "-z", f"{ref}:modules"],
+        cwd=str(portal_directory),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    ).stdout.decode("utf-8")
+    objects = {}
+    for entry in filter(None, listing.split("\0")):
+        info, path = entry.split("\t", 1)
+        _, kind, sha = info.split()
+        *directories, name = path.split("/")
+        if (
+            kind == "blob"
+            and name in POM_INPUTS
+            and _IGNORED_DIRECTORIES.isdisjoint(directories)
+        ):
+            objects[path] = sha
+    paths = sorted(objects, key=_walk_order)
+
+    # Read the contents of all inputs with a single process.
+    output = subprocess.run(
+        ["git", "cat-file", "--batch"],
+        cwd=str(portal_directory),
+        input="".join(f"{objects[path]}\n" for path in paths).encode("ascii"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    ).stdout
+    contents = []
+    offset = 0
+    for _ in paths:
+        header_end = output.index(b"\n", offset)
+        size = int(output[offset:header_end].split()[2])
+        contents.append(output[header_end + 1 : header_end + 1 + size])
+        offset = header_end + 1 + size + 1
+    return _digest(zip(paths, contents))
+
+
+def generate_pom_file(
+    portal_directory: PathLike, cache_dir: PathLike = None, force=False
+) -> Path:
+    """Generate the POM of dependencies of *portal_directory* and return its
+    path.
+
+    If *cache_dir* is given, generated POMs are stored in it under the hash of
+    their inputs, and Gradle is not run at all if a POM with the same inputs
+    was generated before, unless *force* is true.
+
+    :raises subprocess.CalledProcessError: if Gradle failed. Its standard error
+        is in the ``stderr`` attribute of the exception.
+    """
+    cached = None
+    if cache_dir is not None:
+        cached = Path(cache_dir) / f"{pom_inputs_digest(portal_directory)}.pom"
+        if not force and cached.is_file():
+            return cached
+
+    # Run in the modules directory without changing the working directory of
+    # the process, so that POMs can be generated in several threads at once.
+    # If Gradle fails, the POM that is left over from an earlier run must not
+    # be used.
+    subprocess.run(
+        ["../gradlew", "-b", "releng.gradle", "generatePomThirdParty"],
+        cwd=f"{portal_directory}/modules",
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    path = Path(portal_directory) / POM_PATH
+    if cached is None:
+        return path
+
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(cached, "wb") as fp, path.open("rb") as pom:
+        shutil.copyfileobj(pom, fp)
+    return cached
+
+
+def generate_pom(
+    portal_directory: PathLike, cache_dir: PathLike = None, force=False
+) -> str:
+    """Generate the POM of dependencies of *portal_directory* and return the POM
+    as a string. See :func:`generate_pom_file`.
+    """
+    return generate_pom_file(
+        portal_directory, cache_dir=cache_dir, force=force
     ).read_text()
 
 
@@ -56,8 +198,9 @@ def _remove_namespace_from_xml(root: Element) -> Element:
 
 def convert_to_tree(xml: str) -> Element:
     """Convert an XML string to an XML tree object."""
-    root = fromstring(xml)
-    return _remove_namespace_from_xml(root)
+    with instrumentation.timer("phase", phase="parse_pom"):
+        root = fromstring(xml)
+        return _remove_namespace_from_xml(root)
 
 
 def dependencies_from_tree(root: Element) -> List[Dependency]:
@@ -78,6 +221,46 @@ def dependencies_from_tree(root: Element) -> List[Dependency]:
     return result
 
 
+def _local_name(tag: str) -> str:
+    return tag[tag.rfind("}") + 1 :]
+
+
+def iter_dependencies(source: Union[PathLike, IO]) -> Iterator[Dependency]:
+    """Parse the POM in *source*, a path or a file object, and lazily yield the
+    dependencies in its ``dependencyManagement`` section.
+
+    Elements are discarded as soon as they have been parsed, so memory use does
+    not grow with the size of the POM.
+    """
+    if isinstance(source, PathLike):
+        source = str(source)
+    # Local names of the elements that are currently open, and the elements
+    # themselves.
+    path = []
+    elements = []
+    fields = {}
+    for event, element in iterparse(source, events=("start", "end")):
+        if event == "start":
+            path.append(_local_name(element.tag))
+            elements.append(element)
+            continue
+
+        name = path.pop()
+        elements.pop()
+        if path[1:] == _DEPENDENCY_PATH and name in _DEPENDENCY_FIELDS:
+            fields[name] = element.text
+        elif path[1:] == _DEPENDENCY_PATH[:-1] and name == "dependency":
+            yield Dependency(
+                fields.get("groupId"),
+                fields.get("artifactId"),
+                fields.get("version"),
+            )
+            fields = {}
+        element.clear()
+        if elements:
+            elements[-1].remove(element)
+
+
 def get_current_revision(portal_directory: PathLike) -> str:
     with cwd(portal_directory):
         return (
@@ -88,3 +271,50 @@ def get_current_revision(portal_directory: PathLike) -> str:
             .stdout.decode("utf-8")
             .strip()
         )
+
+
+def resolve_revision(portal_directory: PathLike, ref: str) -> str:
+    """Return the SHA of the commit that *ref* points to.
+
+    :raises subprocess.CalledProcessError: if *ref* is not a commit.
+    """
+    return (
+        subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"],
+            cwd=str(portal_directory),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        .stdout.decode("utf-8")
+        .strip()
+    )
+
+
+@contextmanager
+def worktree(portal_directory: PathLike, ref: str) -> Iterator[Path]:
+    """Check out *ref* of the Git repository in *portal_directory* in a
+    temporary worktree, and yield the path to the worktree. The working copy of
+    *portal_directory* itself is left alone.
+
+    :raises subprocess.CalledProcessError: if the worktree could not be
+        created, for instance because *ref* does not exist.
+    """
+    directory = Path(tempfile.mkdtemp(prefix="liferay_inbound_checker-"))
+    try:
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", str(directory), ref],
+            cwd=str(portal_directory),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        yield directory
+    finally:
+        subprocess.run(
+            ["git", "worktree", "remove", "--force", str(directory)],
+            cwd=str(portal_directory),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        shutil.rmtree(str(directory), ignore_errors=True)
@@ -0,0 +1,279 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Lightweight timers and counters around the phases of a run.
+
+Code is instrumented with :func:`timer` and :func:`count`. Both return
+immediately until instrumentation is enabled with :func:`enable`, or by adding
+a hook with :func:`add_hook`. Measurements are identified by a name and
+optional labels, for instance ``count("clearlydefined.responses",
+status="200")``.
+
+Measurements made in the worker processes of the process backend are not
+collected.
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+#: A name and a sorted tuple of label pairs.
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+#: Called with the kind of measurement ("timer" or "counter"), its name, its
+#: labels and its value, every time a measurement is made.
+Hook = Callable[[str, str, Dict[str, str], float], None]
+
+
+class Stats(NamedTuple):
+    """Summary of the samples of a timer, in seconds."""
+
+    count: int
+    total: float
+    p50: float
+    p95: float
+    maximum: float
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Return the *fraction* percentile of the sorted *samples*, using the
+    nearest-rank method.
+    """
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(len(samples) * fraction))
+    return samples[rank - 1]
+
+
+class Registry:
+    """Samples of timers and totals of counters. A single registry can be
+    shared between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(float)
+
+    def record(self, key: Key, seconds: float):
+        with self._lock:
+            self.samples[key].append(seconds)
+
+    def add(self, key: Key, amount: float):
+        with self._lock:
+            self.counters[key] += amount
+
+    def counter(self, name: str, **labels) -> float:
+        """Return the total of a counter."""
+        with self._lock:
+            return self.counters.get(_key(name, labels), 0)
+
+    def counter_total(self, name: str) -> float:
+        """Return the total of a counter across all of its labels."""
+        with self._lock:
+            return sum(
+                value
+                for (key_name, _), value in self.counters.items()
+                if key_name == name
+            )
+
+    def timers(self) -> Dict[Key, List[float]]:
+        """Return a copy of the sorted samples of every timer."""
+        with self._lock:
+            return {key: sorted(value) for key, value in self.samples.items()}
+
+    def counter_values(self) -> Dict[Key, float]:
+        """Return a copy of the totals of every counter."""
+        with self._lock:
+            return dict(self.counters)
+
+    def stats(self) -> Dict[Key, Stats]:
+        """Return a summary of the samples of every timer."""
+        return {
+            key: Stats(
+                len(value),
+                sum(value),
+                percentile(value, 0.5),
+                percentile(value, 0.95),
+                value[-1],
+            )
+            for key, value in self.timers().items()
+        }
+
+
+_registry = Registry()
+_hooks = []
+_enabled = False
+
+
+def _key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted(labels.items()))
+
+
+def format_key(key: Key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return "{}{{{}}}".format(
+        name, ",".join(f"{label}={value}" for label, value in labels)
+    )
+
+
+def enable():
+    """Start collecting measurements."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop collecting measurements, and remove all hooks."""
+    global _enabled
+    _enabled = False
+    _hooks.clear()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def registry() -> Registry:
+    """Return the registry in which measurements are collected."""
+    return _registry
+
+
+def reset():
+    """Throw away all measurements that were collected."""
+    global _registry
+    _registry = Registry()
+
+
+def add_hook(hook: Hook):
+    """Call *hook* for every measurement that is made from now on. This
+    enables instrumentation.
+    """
+    _hooks.append(hook)
+    enable()
+
+
+def remove_hook(hook: Hook):
+    _hooks.remove(hook)
+
+
+def _emit(kind: str, key: Key, value: float):
+    for hook in _hooks:
+        hook(kind, key[0], dict(key[1]), value)
+
+
+class _Timer:
+    __slots__ = ("_key", "_started")
+
+    def __init__(self, key: Key):
+        self._key = key
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self._started
+        _registry.record(self._key, elapsed)
+        if _hooks:
+            _emit("timer", self._key, elapsed)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str, **labels):
+    """Return a context manager that records how long its body takes."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(_key(name, labels))
+
+
+def record(name: str, seconds: float, **labels):
+    """Record a sample of a timer that was measured elsewhere."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    _registry.record(key, seconds)
+    if _hooks:
+        _emit("timer", key, seconds)
+
+
+def count(name: str, amount: float = 1, **labels):
+    """Add *amount* to a counter."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    _registry.add(key, amount)
+    if _hooks:
+        _emit("counter", key, amount)
+
+
+def timed_iter(name: str, iterable: Iterable, **labels) -> Iterable:
+    """Wrap *iterable*, and record the total time spent producing its items
+    as a single sample once it is exhausted. This times lazy phases, such as
+    parsing, that are interleaved with other work.
+    """
+    if not _enabled:
+        return iterable
+    return _timed_iter(_key(name, labels), iter(iterable))
+
+
+def _timed_iter(key: Key, iterator: Iterator) -> Iterator:
+    elapsed = 0.0
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            elapsed += time.perf_counter() - started
+        yield item
+    _registry.record(key, elapsed)
+    if _hooks:
+        _emit("timer", key, elapsed)
+
+
+def format_summary() -> List[str]:
+    """Return the lines of a human-readable summary of all measurements."""
+    lines = []
+    stats = _registry.stats()
+    if stats:
+        width = max(len(format_key(key)) for key in stats)
+        lines.append(
+            f"{'Timer':<{width}}  {'count':>7}  {'total':>9}  {'p50':>9}"
+            f"  {'p95':>9}  {'max':>9}"
+        )
+        for key, value in sorted(stats.items()):
+            lines.append(
+                f"{format_key(key):<{width}}  {value.count:>7}"
+                f"  {value.total:>8.3f}s  {value.p50:>8.3f}s"
+                f"  {value.p95:>8.3f}s  {value.maximum:>8.3f}s"
+            )
+
+    hits = _registry.counter("cache.lookups", outcome="hit")
+    lookups = _registry.counter_total("cache.lookups")
+    if lookups:
+        lines.append(f"Cache hit rate: {hits / lookups:.1%} of {lookups:.0f}")
+    lines.append(
+        f"Retries: {_registry.counter_total('clearlydefined.retries'):.0f}"
+    )
+    for key, value in sorted(_registry.counter_values().items()):
+        lines.append(f"{format_key(key)}: {value:g}")
+    return lines
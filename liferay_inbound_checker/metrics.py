@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Export of measurements in the Prometheus text exposition format, which the
+textfile collector of the Prometheus node_exporter reads. That collector does
+not understand the newer OpenMetrics format, so the file has no ``# UNIT`` and
+``# EOF`` lines, and counters are typed under the names of their samples.
+
+Timers become histograms, except for the ``phase`` timer, which becomes a gauge
+of the seconds spent in every phase. Counters become counters.
+"""
+
+import re
+from collections import defaultdict
+from os import PathLike
+from typing import Iterable, List, Tuple
+
+from . import atomic_write, instrumentation
+from .instrumentation import Registry
+
+#: Prefix of the names of all metric families.
+PREFIX = "liferay_inbound_checker_"
+
+#: Upper bounds of the buckets of histograms, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_INVALID_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def metric_name(name: str) -> str:
+    """Turn the name of a measurement, such as ``clearlydefined.requests``,
+    into the name of a metric family.
+    """
+    return PREFIX + _INVALID_CHARS.sub("_", name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{{{}}}".format(
+        ",".join(f'{label}="{_escape(str(value))}"' for label, value in labels)
+    )
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _group(items) -> dict:
+    families = defaultdict(list)
+    for (name, labels), value in sorted(items):
+        families[name].append((labels, value))
+    return families
+
+
+def format_metrics(
+    registry: Registry = None, buckets: Iterable[float] = DEFAULT_BUCKETS
+) -> List[str]:
+    """Return the lines of the exposition of all measurements in
+    *registry*, which defaults to the active registry.
+    """
+    if registry is None:
+        registry = instrumentation.registry()
+    buckets = sorted(buckets)
+    lines = []
+
+    for name, samples in _group(registry.timers().items()).items():
+        family = metric_name(name)
+        if name == "phase":
+            family = f"{family}_seconds"
+            lines.append(f"# TYPE {family} gauge")
+            for labels, values in samples:
+                lines.append(
+                    f"{family}{_format_labels(labels)}"
+                    f" {_format_value(sum(values))}"
+                )
+            continue
+
+        family = f"{family}_seconds"
+        lines.append(f"# TYPE {family} histogram")
+        for labels, values in samples:
+            position = 0
+            for bound in buckets:
+                while position < len(values) and values[position] <= bound:
+                    position += 1
+                bucket_labels = labels + (("le", repr(float(bound))),)
+                lines.append(
+                    f"{family}_bucket{_format_labels(bucket_labels)}"
+                    f" {position}"
+                )
+            lines.append(
+                f"{family}_bucket{_format_labels(labels + (('le', '+Inf'),))}"
+                f" {len(values)}"
+            )
+            lines.append(
+                f"{family}_count{_format_labels(labels)} {len(values)}"
+            )
+            lines.append(
+                f"{family}_sum{_format_labels(labels)}"
+                f" {_format_value(sum(values))}"
+            )
+
+    for name, samples in _group(registry.counter_values().items()).items():
+        family = f"{metric_name(name)}_total"
+        lines.append(f"# TYPE {family} counter")
+        for labels, value in samples:
+            lines.append(
+                f"{family}{_format_labels(labels)} {_format_value(value)}"
+            )
+
+    return lines
+
+
+def write_metrics(path: PathLike, registry: Registry = None):
+    """Write the exposition of *registry* to *path*. The file is
+    replaced atomically, so that a collector never reads a partial file.
+    """
+    with atomic_write(path, encoding="utf-8") as fp:
+        fp.writelines(f"{line}\n" for line in format_metrics(registry))
@@ -0,0 +1,137 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Checking dependencies in pools of workers."""
+
+import os
+import time
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .cache import DefinitionsCache
+from .check import Result, Whitelist, check
+from .clearlydefined import ClearlyDefinedClient, ClearlyDefinedDefinitions
+from .dependencies import Dependency
+from .retry import RateLimiter, RetryPolicy
+
+#: Amount of dependencies that are checked one by one to decide on the amount
+#: of workers, when it is tuned automatically.
+SAMPLE_SIZE = 8
+
+#: Maximum amount of workers when it is tuned automatically.
+MAX_WORKERS = 64
+
+
+def optimal_workers(
+    wall_time: float, cpu_time: float, cpus: int = 1, maximum=MAX_WORKERS
+) -> int:
+    """Return the amount of workers that keeps *cpus* processors busy, if
+    a check takes *wall_time* seconds, of which *cpu_time* seconds are spent
+    computing rather than waiting: ``cpus * (1 + wait / compute)``.
+    """
+    if cpu_time <= 0:
+        return maximum
+    wait_time = max(0.0, wall_time - cpu_time)
+    return max(1, min(maximum, round(cpus * (1 + wait_time / cpu_time))))
+
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[object, float, float]:
+    """Call *func*, and return its return value, the wall time it took and the
+    CPU time that the calling thread spent on it.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    value = func(*args, **kwargs)
+    return (
+        value,
+        time.perf_counter() - wall_start,
+        time.thread_time() - cpu_start,
+    )
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+#: Whitelist and client of the current worker process.
+_process_state = {}
+
+
+def _client_options(client: ClearlyDefinedClient, workers: int) -> Dict:
+    """Return what a worker process needs to create a client like *client*.
+    The rate limit is divided between the workers.
+    """
+    rate = client.rate_limiter.rate
+    return {
+        "timeout": client.timeout,
+        "cache_dir": client.cache.directory if client.cache else None,
+        "base_url": client.base_url,
+        "rate": rate / workers if rate else None,
+        "retries": client.retry_policy.retries,
+        "backoff": client.retry_policy.backoff,
+        "max_backoff": client.retry_policy.max_backoff,
+    }
+
+
+def _initialize_process(whitelist: Whitelist, options: Dict):
+    cache = None
+    if options["cache_dir"] is not None:
+        cache = DefinitionsCache(options["cache_dir"])
+    _process_state["whitelist"] = whitelist
+    _process_state["client"] = ClearlyDefinedClient(
+        pool_size=1,
+        timeout=options["timeout"],
+        cache=cache,
+        base_url=options["base_url"],
+        rate_limiter=RateLimiter(options["rate"]),
+        retry_policy=RetryPolicy(
+            options["retries"], options["backoff"], options["max_backoff"]
+        ),
+    )
+
+
+def _check_in_process(
+    item: Tuple[Union[Dependency, Result], Optional[ClearlyDefinedDefinitions]]
+) -> Result:
+    dependency, definitions = item
+    if isinstance(dependency, Result):
+        return dependency
+    return check(
+        dependency,
+        whitelist=_process_state["whitelist"],
+        prefetched={dependency: definitions} if definitions else None,
+        client=_process_state["client"],
+    )
+
+
+def check_in_processes(
+    dependencies: Iterable[Union[Dependency, Result]],
+    whitelist: Whitelist,
+    prefetched: Dict[Dependency, ClearlyDefinedDefinitions],
+    client: ClearlyDefinedClient,
+    workers: int,
+) -> Iterator[Result]:
+    """Check *dependencies* in *workers* processes, each with its own client
+    configured like *client*, and yield the results in the order in which
+    they complete. Only the prefetched definitions of a dependency are sent
+    to the process that checks it. Results in *dependencies* are passed on as
+    they are.
+
+    Closing the iterator terminates the processes.
+    """
+    with Pool(
+        workers,
+        initializer=_initialize_process,
+        initargs=(whitelist, _client_options(client, workers)),
+    ) as pool:
+        yield from pool.imap_unordered(
+            _check_in_process,
+            (
+                (dependency, prefetched.get(dependency))
+                for dependency in dependencies
+            ),
+        )
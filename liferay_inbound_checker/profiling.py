@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Profilers that cover all threads of a run, including the workers of the
+thread backend. Worker processes of the process backend are not profiled.
+"""
+
+import cProfile
+import pstats
+import sys
+import threading
+from collections import Counter
+from os import PathLike
+from types import FrameType
+
+#: Seconds between two samples of the sampling profiler.
+DEFAULT_INTERVAL = 0.005
+
+#: Since Python 3.12, cProfile is built on sys.monitoring, so a single
+#: profiler already sees the calls in every thread.
+_PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class ThreadProfiler:
+    """Deterministic profiler that gives every thread started while it runs a
+    :class:`cProfile.Profile` of its own, and merges them into a single pstats
+    file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._main = cProfile.Profile()
+        self._profiles = []
+
+    def _profile_thread(self, *args):
+        # Called on the first event in a new thread; enabling the profile
+        # replaces this function as the profiler of the thread.
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        if not _PROFILES_ALL_THREADS:
+            threading.setprofile(self._profile_thread)
+        self._main.enable()
+
+    def stop(self):
+        self._main.disable()
+        if not _PROFILES_ALL_THREADS:
+            threading.setprofile(None)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            stats.add(profile)
+        return stats
+
+    def write(self, path: PathLike):
+        """Write the merged profiles to *path* in the pstats format, which
+        ``python -m pstats`` and tools like snakeviz read.
+        """
+        self.stats().dump_stats(str(path))
+
+
+def _collapse(frame: FrameType) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Statistical profiler that records the stacks of all threads every
+    *interval* seconds, and writes them as collapsed stacks, which
+    ``flamegraph.pl`` and speedscope turn into flame graphs.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        #: Amount of samples per collapsed stack.
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, name="sampling-profiler", daemon=True
+        )
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.stacks[_collapse(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, path: PathLike):
+        with open(path, "w", encoding="utf-8") as fp:
+            for stack, samples in sorted(self.stacks.items()):
+                fp.write(f"{stack} {samples}\n")
+
+
+#: Profiler classes by the name of their output format.
+PROFILERS = {"pstats": ThreadProfiler, "collapsed": SamplingProfiler}
@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Machine-readable reports of results.
+
+Reports are written incrementally: every result is written and flushed as soon
+as it is reported, so nothing is held in memory and a report of an interrupted
+run is still useful.
+"""
+
+import json
+import socket
+from abc import ABC, abstractmethod
+from datetime import datetime
+from os import PathLike
+from typing import Dict
+from xml.sax.saxutils import escape, quoteattr
+
+from .check import RequestExceptionReason, Result
+
+
+def result_to_dict(result: Result) -> Dict:
+    """Return *result* as a JSON-serialisable dictionary."""
+    return {
+        "dependency": result.dependency._asdict(),
+        "success": result.success,
+        "reasons": [
+            dict(reason.to_dict(), message=str(reason))
+            for reason in result.reasons
+        ],
+        "duration": result.duration,
+        "retries": len(result.retries),
+        "cached": result.cached,
+    }
+
+
+class Report(ABC):
+    """Base class for reports that are written to *path*."""
+
+    def __init__(self, path: PathLike):
+        self._fp = open(path, "w", encoding="utf-8")
+        self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        """Write what precedes the results."""
+
+    def finish(self):
+        """Write what follows the results."""
+
+    def write(self, result: Result):
+        """Write *result* to the report and flush it."""
+        self._fp.write(self.format(result))
+        self._fp.flush()
+
+    @abstractmethod
+    def format(self, result: Result) -> str:
+        """Return *result* as it is written to the report."""
+
+    def close(self):
+        if not self._fp.closed:
+            self.finish()
+            self._fp.close()
+
+
+class JsonLinesReport(Report):
+    """Report with a JSON object per result on every line."""
+
+    def format(self, result: Result) -> str:
+        return json.dumps(result_to_dict(result)) + "\n"
+
+
+class JUnitXmlReport(Report):
+    """JUnit XML report with a test case per result. Failed requests are
+    reported as errors, failed checks as failures.
+
+    Because the report is written incrementally, the test suite does not carry
+    the totals in its attributes; JUnit consumers count the test cases
+    themselves.
+    """
+
+    #: Name of the test suite.
+    NAME = "liferay_inbound_checker"
+
+    def start(self):
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        self._fp.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            "<testsuites>\n"
+            f"  <testsuite name={quoteattr(self.NAME)}"
+            f" timestamp={quoteattr(timestamp)}"
+            f" hostname={quoteattr(socket.gethostname())}>\n"
+        )
+
+    def finish(self):
+        self._fp.write("  </testsuite>\n</testsuites>\n")
+
+    def format(self, result: Result) -> str:
+        dependency = result.dependency
+        name = f"{dependency.artifactid}@{dependency.version}"
+        attributes = (
+            f"classname={quoteattr(dependency.groupid)}"
+            f" name={quoteattr(name)}"
+            f' time="{result.duration or 0.0:.3f}"'
+        )
+        if result.success:
+            return f"    <testcase {attributes}/>\n"
+
+        errors = any(
+            isinstance(reason, RequestExceptionReason)
+            for reason in result.reasons
+        )
+        tag = "error" if errors else "failure"
+        message = ", ".join(type(reason).__name__ for reason in result.reasons)
+        text = "\n\n".join(str(reason) for reason in result.reasons)
+        return (
+            f"    <testcase {attributes}>\n"
+            f"      <{tag} message={quoteattr(message)}>"
+            f"{escape(text)}</{tag}>\n"
+            "    </testcase>\n"
+        )
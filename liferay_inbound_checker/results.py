@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Persistent on-disk cache of the results of checks.
+
+A result only depends on the definitions of the dependency and on the policy:
+the license whitelist, the target score and the whitelist of dependencies.
+Results are therefore stored under a hash of the policy, and expire like the
+definitions that they were computed from.
+"""
+
+import hashlib
+import json
+import time
+from typing import Optional
+
+from . import LICENSE_WHITELIST, __version__
+from .cache import SQLiteStore
+from .check import (
+    Reason,
+    RequestExceptionReason,
+    Result,
+    ScoreCheck,
+    Whitelist,
+)
+from .dependencies import Dependency
+
+
+def policy_digest(whitelist: Whitelist) -> str:
+    """Return a hash of everything besides the definitions of a dependency
+    that determines the result of checking it.
+    """
+    policy = {
+        "version": __version__,
+        "licenses": sorted(LICENSE_WHITELIST),
+        "target_score": ScoreCheck.TARGET_NUMBER,
+        "whitelist": whitelist.digest,
+    }
+    return hashlib.sha256(
+        json.dumps(policy, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def is_cacheable(result: Result) -> bool:
+    """Whether *result* can be reused. Results of failed requests cannot, and
+    neither can results evaluated from empty definitions, which are not cached
+    either.
+    """
+    if result.empty_definitions:
+        return False
+    return not any(
+        isinstance(reason, RequestExceptionReason) for reason in result.reasons
+    )
+
+
+class ResultCache(SQLiteStore):
+    """SQLite-backed cache of results, keyed by the dependency and the hash of
+    the policy it was checked against. Entries expire *ttl* seconds after the
+    dependency was checked, and the cache is trimmed down to *max_entries*
+    entries by evicting the least recently used ones.
+
+    A single cache can be shared between threads.
+    """
+
+    FILENAME = "results.sqlite"
+    TABLE = "results"
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS results (
+            dependency TEXT NOT NULL,
+            policy TEXT NOT NULL,
+            success INTEGER NOT NULL,
+            reasons TEXT NOT NULL,
+            checked REAL NOT NULL,
+            accessed REAL NOT NULL,
+            PRIMARY KEY (dependency, policy)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS results_accessed
+        ON results (accessed)
+        """,
+    )
+    EXPIRED = "checked < ?"
+
+    def get(self, dependency: Dependency, policy: str) -> Optional[Result]:
+        """Return the result of checking *dependency* against *policy*, or None
+        if there is none or if it has expired.
+        """
+        now = time.time()
+        key = str(dependency)
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT success, reasons FROM results
+                WHERE dependency = ? AND policy = ? AND checked >= ?
+                """,
+                (key, policy, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                """
+                UPDATE results SET accessed = ?
+                WHERE dependency = ? AND policy = ?
+                """,
+                (now, key, policy),
+            )
+        success, reasons = row
+        result = Result(dependency)
+        result.success = bool(success)
+        try:
+            result.reasons = [
+                Reason.from_dict(reason) for reason in json.loads(reasons)
+            ]
+        except KeyError:
+            # A reason that no longer exists.
+            return None
+        result.cached = True
+        return result
+
+    def set(self, result: Result, policy: str):
+        """Store *result*, which was checked against *policy*. Results that
+        came from the cache or that are not cacheable are ignored.
+        """
+        if result.cached or not is_cacheable(result):
+            return
+        now = time.time()
+        reasons = json.dumps([reason.to_dict() for reason in result.reasons])
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO results
+                    (dependency, policy, success, reasons, checked, accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    str(result.dependency),
+                    policy,
+                    result.success,
+                    reasons,
+                    now,
+                    now,
+                ),
+            )
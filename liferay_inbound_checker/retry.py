@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Rate limiting and retrying of requests to ClearlyDefined."""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Optional, Union
+
+#: Status codes of responses that are worth retrying.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+#: Amount of times a request is retried before giving up.
+DEFAULT_RETRIES = 3
+
+#: Seconds that the exponential backoff starts at.
+DEFAULT_BACKOFF = 0.5
+
+#: Maximum seconds to wait before retrying a request.
+DEFAULT_MAX_BACKOFF = 60.0
+
+
+class Retry(NamedTuple):
+    """Record of a request that was retried."""
+
+    url: str
+    attempt: int
+    #: The status code of the response, or the error if there was none.
+    cause: Union[int, str]
+    delay: float
+
+
+class RateLimiter:
+    """Token bucket that allows *rate* requests per second on average, with
+    bursts of up to *burst* requests. If *rate* is None or 0, requests are not
+    limited, except when the limiter is paused.
+
+    A single limiter is shared between all workers, so that a pause (for
+    instance after ClearlyDefined responded with 429 Too Many Requests) holds
+    back every worker.
+    """
+
+    def __init__(self, rate: float = None, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token from the bucket, and return the seconds that the caller
+        must wait before it may make its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._paused_until - now)
+            if not self.rate:
+                return delay
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                delay = max(delay, -self._tokens / self.rate)
+            return delay
+
+    def acquire(self):
+        """Block until a request may be made."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Hold back all requests for the next *seconds*."""
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + seconds
+            )
+
+
+def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """Return the seconds that a Retry-After header asks to wait, or None if
+    it cannot be parsed.
+    """
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(
+            0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Decide how long to wait before retrying a request: whatever the
+    Retry-After header asks for, or else an exponential backoff with full
+    jitter. A request is retried at most *retries* times.
+    """
+
+    def __init__(
+        self,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def should_retry(self, attempt: int, status_code: int = None) -> bool:
+        """Whether attempt number *attempt* (counting from 0) should be
+        retried. If the attempt yielded a response, *status_code* is its status
+        code.
+        """
+        if attempt >= self.retries:
+            return False
+        return status_code is None or status_code in RETRY_STATUS_CODES
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """Return the seconds to wait before retrying attempt number
+        *attempt*.
+        """
+        seconds = _parse_retry_after(retry_after)
+        if seconds is None:
+            seconds = random.uniform(0, self.backoff * 2 ** attempt)
+        return min(seconds, self.max_backoff)
@@ -0,0 +1,203 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Offline snapshots of ClearlyDefined definitions.
+
+A snapshot is a SQLite database that maps the ClearlyDefined coordinates of
+dependencies to their definitions. Lookups go through the primary key index, so
+a snapshot is never read into memory as a whole.
+"""
+
+import sqlite3
+import threading
+import time
+from os import PathLike
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+from . import __version__
+from .cache import _decode, _encode
+from .clearlydefined import (
+    DEFAULT_CHUNK_SIZE,
+    BulkResult,
+    ClearlyDefinedClient,
+    ClearlyDefinedDefinitions,
+    _chunks,
+    clearlydefined_coordinates,
+)
+from .dependencies import Dependency
+
+
+class MissingFromSnapshot(LookupError):
+    """The definitions of a dependency are not in the snapshot."""
+
+
+def write_snapshot(path: PathLike, definitions: Mapping[Dependency, Dict]):
+    """Write the *definitions* of dependencies to a snapshot at *path*,
+    replacing any snapshot that is already there.
+    """
+    connection = sqlite3.connect(str(path))
+    try:
+        with connection:
+            connection.execute("DROP TABLE IF EXISTS definitions")
+            connection.execute("DROP TABLE IF EXISTS meta")
+            connection.execute(
+                """
+                CREATE TABLE definitions (
+                    coordinates TEXT PRIMARY KEY,
+                    body BLOB NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            connection.execute(
+                "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            connection.executemany(
+                "INSERT INTO definitions VALUES (?, ?)",
+                (
+                    (
+                        clearlydefined_coordinates(dependency),
+                        _encode(json_dict),
+                    )
+                    for dependency, json_dict in definitions.items()
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("created", str(time.time())), ("version", __version__)],
+            )
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+
+
+def export_snapshot(
+    path: PathLike,
+    dependencies: Iterable[Dependency],
+    client: ClearlyDefinedClient,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[Dependency]:
+    """Retrieve the definitions of *dependencies* using *client*, and write
+    them to a snapshot at *path*. Return the dependencies whose definitions
+    could not be retrieved.
+    """
+    from requests import RequestException
+
+    dependencies = list(dependencies)
+    definitions = {
+        dependency: value.as_dict()
+        for dependency, value in client.bulk_definitions(
+            dependencies, chunk_size=chunk_size
+        ).items()
+    }
+    missing = []
+    for dependency in dependencies:
+        if dependency in definitions:
+            continue
+        try:
+            definitions[dependency] = ClearlyDefinedDefinitions(
+                client.definitions(dependency)
+            ).as_dict()
+        except RequestException:
+            missing.append(dependency)
+    write_snapshot(path, definitions)
+    return missing
+
+
+class Snapshot:
+    """Read-only access to the snapshot at *path*. A single snapshot can be
+    shared between threads.
+    """
+
+    def __init__(self, path: PathLike):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def get(self, dependency: Dependency) -> Optional[Dict]:
+        """Return the definitions of *dependency*, or None if they are not in
+        the snapshot.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body FROM definitions WHERE coordinates = ?",
+                (clearlydefined_coordinates(dependency),),
+            ).fetchone()
+        if row is None:
+            return None
+        return _decode(row[0])
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM definitions"
+            ).fetchone()[0]
+
+
+class OfflineClient:
+    """Drop-in replacement for
+    :class:`~liferay_inbound_checker.clearlydefined.ClearlyDefinedClient` that
+    serves definitions from a :class:`Snapshot` and never touches the network.
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.snapshot.close()
+
+    def definitions(self, dependency: Dependency, on_retry=None) -> Dict:
+        """
+        :raises MissingFromSnapshot: if *dependency* is not in the snapshot.
+        """
+        json_dict = self.snapshot.get(dependency)
+        if json_dict is None:
+            raise MissingFromSnapshot(
+                f"'{clearlydefined_coordinates(dependency)}' is not in the"
+                f" offline snapshot"
+            )
+        return json_dict
+
+    def bulk_definitions(
+        self,
+        dependencies: Iterable[Dependency],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[Dependency, ClearlyDefinedDefinitions]:
+        result = {}
+        for dependency in dependencies:
+            json_dict = self.snapshot.get(dependency)
+            if json_dict is not None:
+                result[dependency] = ClearlyDefinedDefinitions(json_dict)
+        return result
+
+    def bulk_chunks(
+        self,
+        dependencies: Iterable[Dependency],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[List[BulkResult]]:
+        for chunk in _chunks(dependencies, chunk_size):
+            result = []
+            for dependency in chunk:
+                json_dict = self.snapshot.get(dependency)
+                definitions = None
+                if json_dict is not None:
+                    definitions = ClearlyDefinedDefinitions(json_dict)
+                result.append(BulkResult(dependency, definitions, [], None))
+            yield result
@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Maven versions and version ranges."""
+
+import re
+from functools import total_ordering
+from typing import List, NamedTuple, Optional, Union
+
+_ITEM = re.compile(r"\d+|[a-z]+")
+
+_ALIASES = {"a": "alpha", "b": "beta", "m": "milestone", "cr": "rc"}
+_QUALIFIERS = ["alpha", "beta", "milestone", "rc", "snapshot", "", "sp"]
+_RELEASE = _QUALIFIERS.index("")
+_RELEASE_QUALIFIERS = frozenset({"", "ga", "final", "release"})
+
+
+def _qualifier_key(qualifier: str):
+    if qualifier in _RELEASE_QUALIFIERS:
+        return (_RELEASE, "")
+    try:
+        return (_QUALIFIERS.index(qualifier), "")
+    except ValueError:
+        # Unknown qualifiers come after all known ones, in lexical order.
+        return (len(_QUALIFIERS), qualifier)
+
+
+def _compare_items(
+    left: Optional[Union[int, str]], right: Optional[Union[int, str]]
+) -> int:
+    """Compare two items of a version like Maven does. None stands for a
+    missing item, which equals 0 or a release qualifier.
+    """
+    if left is None and right is None:
+        return 0
+    if left is None:
+        return -_compare_items(right, left)
+    if isinstance(left, int):
+        if right is None:
+            right = 0
+        if isinstance(right, int):
+            return (left > right) - (left < right)
+        # Numbers come after qualifiers.
+        return 1
+    if isinstance(right, int):
+        return -1
+    if right is None:
+        right = ""
+    left_key = _qualifier_key(left)
+    right_key = _qualifier_key(right)
+    return (left_key > right_key) - (left_key < right_key)
+
+
+@total_ordering
+class MavenVersion:
+    """A version that is ordered like Maven's ComparableVersion, in simplified
+    form: ``1.0-alpha-1 < 1.0-beta < 1.0-rc1 < 1.0-SNAPSHOT < 1.0 = 1.0.0
+    < 1.0-sp < 1.0.1``.
+    """
+
+    __slots__ = ("text", "_items")
+
+    def __init__(self, text: str):
+        self.text = text
+        items = []
+        for item in _ITEM.findall(text.lower()):
+            if item.isdigit():
+                items.append(int(item))
+            else:
+                items.append(_ALIASES.get(item, item))
+        while items and (items[-1] == 0 or items[-1] in _RELEASE_QUALIFIERS):
+            items.pop()
+        self._items = tuple(items)
+
+    def _compare(self, other: "MavenVersion") -> int:
+        length = max(len(self._items), len(other._items))
+        for i in range(length):
+            left = self._items[i] if i < len(self._items) else None
+            right = other._items[i] if i < len(other._items) else None
+            result = _compare_items(left, right)
+            if result:
+                return result
+        return 0
+
+    def __eq__(self, other):
+        if not isinstance(other, MavenVersion):
+            return NotImplemented
+        return self._items == other._items
+
+    def __lt__(self, other):
+        if not isinstance(other, MavenVersion):
+            return NotImplemented
+        return self._compare(other) < 0
+
+    def __hash__(self):
+        return hash(self._items)
+
+    def __repr__(self):
+        return f"MavenVersion({self.text!r})"
+
+
+class Restriction(NamedTuple):
+    """A single interval of a version range. A bound of None is unbounded."""
+
+    lower: Optional[MavenVersion]
+    lower_inclusive: bool
+    upper: Optional[MavenVersion]
+    upper_inclusive: bool
+
+    def __contains__(self, version: MavenVersion) -> bool:
+        if self.lower is not None:
+            if version < self.lower or (
+                not self.lower_inclusive and version == self.lower
+            ):
+                return False
+        if self.upper is not None:
+            if version > self.upper or (
+                not self.upper_inclusive and version == self.upper
+            ):
+                return False
+        return True
+
+
+#: Restriction that contains every version.
+ANY_VERSION = Restriction(None, False, None, False)
+
+_RESTRICTION = re.compile(
+    r"\s*([\[(])\s*([^,\[\]()]*?)\s*(?:(,)\s*([^,\[\]()]*?)\s*)?([\])])\s*,?"
+)
+
+
+def is_version_range(spec: str) -> bool:
+    """Whether *spec* is a Maven version range rather than a version."""
+    return spec.lstrip().startswith(("[", "("))
+
+
+def parse_version_range(spec: str) -> List[Restriction]:
+    """Parse a Maven version range such as ``[1.0,2.0)``, ``[1.5]`` or
+    ``(,1.0],[1.2,)`` into its restrictions.
+
+    :raises ValueError: if *spec* is not a valid version range.
+    """
+    restrictions = []
+    position = 0
+    while position < len(spec):
+        match = _RESTRICTION.match(spec, position)
+        if match is None:
+            raise ValueError(f"'{spec}' is not a valid version range")
+        opening, lower, comma, upper, closing = match.groups()
+        if not comma:
+            if opening != "[" or closing != "]" or not lower:
+                raise ValueError(f"'{spec}' is not a valid version range")
+            version = MavenVersion(lower)
+            restrictions.append(Restriction(version, True, version, True))
+        else:
+            restrictions.append(
+                Restriction(
+                    MavenVersion(lower) if lower else None,
+                    opening == "[",
+                    MavenVersion(upper) if upper else None,
+                    closing == "]",
+                )
+            )
+        position = match.end()
+    if not restrictions:
+        raise ValueError(f"'{spec}' is not a valid version range")
+    return restrictions
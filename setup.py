@@ -16,6 +16,8 @@ with open("HISTORY.rst") as history_file:
 
 requirements = ["Click>=7.0", "license-expression>=1.0", "PyYAML>=3.08"]
 
+extras_requirements = {"async": ["aiohttp>=3.6"]}
+
 setup_requirements = ["pytest-runner"]
 
 test_requirements = ["pytest>=3"]
@@ -42,6 +44,7 @@ setup(
         ]
     },
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="GNU General Public License v3",
     long_description=readme + "\n\n" + history,
     include_package_data=True,
@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Local stand-in for the ClearlyDefined API, for tests and benchmarks."""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+_PREFIX = "/definitions"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, status_code, body=b""):
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server.fake
+        fake.count_request()
+        time.sleep(fake.latency)
+        if fake.should_fail():
+            self._respond(503)
+            return
+        coordinates = self.path[len(_PREFIX) + 1 :]
+        if not self.path.startswith(_PREFIX) or coordinates in fake.missing:
+            self._respond(404)
+            return
+        self._respond(200, json.dumps(fake.definitions).encode("utf-8"))
+
+    def do_POST(self):
+        fake = self.server.fake
+        fake.count_request(bulk=True)
+        time.sleep(fake.latency)
+        length = int(self.headers.get("Content-Length", 0))
+        coordinates = json.loads(self.rfile.read(length))
+        if fake.should_fail():
+            self._respond(503)
+            return
+        body = {
+            coordinate: fake.definitions
+            for coordinate in coordinates
+            if coordinate not in fake.missing
+        }
+        self._respond(200, json.dumps(body).encode("utf-8"))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeClearlyDefinedServer:
+    """Serve *definitions* for every coordinate except those in
+    :attr:`missing`, after sleeping *latency* seconds per request. A fraction
+    *error_rate* of the requests, picked at random from *seed*, fail with 503
+    Service Unavailable. Use it as a context manager; :attr:`url` is the URL of
+    its definitions endpoint. :attr:`requests` counts all requests, and
+    :attr:`bulk_requests` those to the bulk endpoint.
+    """
+
+    def __init__(
+        self,
+        definitions: Dict,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.definitions = definitions
+        self.latency = latency
+        self.error_rate = error_rate
+        self.missing = set()
+        self.requests = 0
+        self.bulk_requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{_PREFIX}"
+
+    def count_request(self, bulk=False):
+        with self._lock:
+            self.requests += 1
+            self.bulk_requests += bulk
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            self.errors += failed
+        return failed
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,66 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for the asynchronous checking of dependencies."""
+
+import pytest
+
+from liferay_inbound_checker.check import RequestExceptionReason, ScoreCheck
+from liferay_inbound_checker.clearlydefined import clearlydefined_coordinates
+from liferay_inbound_checker.dependencies import Dependency
+
+from .fakeserver import FakeClearlyDefinedServer
+
+aio = pytest.importorskip("liferay_inbound_checker.aio")
+
+
+@pytest.fixture()
+def fake_server(clearlydefined_dict):
+    clearlydefined_dict["scores"]["effective"] = ScoreCheck.TARGET_NUMBER
+    with FakeClearlyDefinedServer(clearlydefined_dict) as server:
+        yield server
+
+
+def test_check_concurrently(fake_server):
+    dependencies = [Dependency("a", "b", str(i)) for i in range(50)]
+
+    results = list(
+        aio.check_concurrently(
+            dependencies, concurrency=10, base_url=fake_server.url
+        )
+    )
+    assert {result.dependency for result in results} == set(dependencies)
+    assert all(result.success for result in results)
+    assert fake_server.requests == len(dependencies)
+
+
+def test_check_concurrently_missing(fake_server):
+    dependency = Dependency("a", "b", "c")
+    fake_server.missing.add(clearlydefined_coordinates(dependency))
+
+    (result,) = aio.check_concurrently([dependency], base_url=fake_server.url)
+    assert not result.success
+    assert isinstance(result.reasons[0], RequestExceptionReason)
+
+
+def test_check_concurrently_whitelisted(fake_server):
+    dependency = Dependency("a", "b", "c")
+    whitelist = [{"name": "a/b", "version": "c"}]
+
+    (result,) = aio.check_concurrently(
+        [dependency], whitelist, base_url=fake_server.url
+    )
+    assert result.success
+    assert not fake_server.requests
+
+
+def test_check_concurrently_stop_early(fake_server):
+    dependencies = [Dependency("a", "b", str(i)) for i in range(50)]
+
+    results = aio.check_concurrently(
+        dependencies, concurrency=1, base_url=fake_server.url
+    )
+    next(results)
+    results.close()
+    assert fake_server.requests < len(dependencies)
@@ -0,0 +1,35 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for the store of dependencies of commits."""
+
+import os
+
+from liferay_inbound_checker.boms import BomStore
+from liferay_inbound_checker.dependencies import Dependency
+
+
+def test_bom_store(tmp_path):
+    store = BomStore(tmp_path / "boms")
+    dependencies = {Dependency("d", "e", "f"), Dependency("a", "b", "c")}
+    assert store.get("abc") is None
+
+    store.set("abc", dependencies)
+    assert store.get("abc") == dependencies
+    assert len(store) == 1
+    assert (tmp_path / "boms/abc.txt").read_text() == "a\tb\tc\nd\te\tf\n"
+
+    new = {Dependency("a", "b", "c"), Dependency("g", "h", "i")}
+    assert new - store.get("abc") == {Dependency("g", "h", "i")}
+
+
+def test_bom_store_prune(tmp_path):
+    store = BomStore(tmp_path, max_entries=2)
+    for i, sha in enumerate(["a", "b"]):
+        store.set(sha, [])
+        os.utime(str(tmp_path / f"{sha}.txt"), (i, i))
+    store.set("c", [Dependency("a", "b", "c")])
+    assert len(store) == 2
+    assert store.get("a") is None
+    assert store.get("c") == {Dependency("a", "b", "c")}
@@ -0,0 +1,182 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for the definitions cache."""
+
+import time
+from json import dumps
+
+import requests
+
+from liferay_inbound_checker.cache import DefinitionsCache
+from liferay_inbound_checker.clearlydefined import (
+    ClearlyDefinedClient,
+    ClearlyDefinedDefinitions,
+    clearlydefined_coordinates,
+    clearlydefined_url,
+)
+from liferay_inbound_checker.dependencies import Dependency
+
+
+class MockResponse:
+    """Super simple mocked version of Response."""
+
+    def __init__(self, text=None, status_code=None, headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.headers = headers if headers is not None else {}
+
+
+def test_cache_simple(tmp_path, clearlydefined_dict):
+    with DefinitionsCache(tmp_path) as cache:
+        assert cache.get("foo") is None
+        cache.set("foo", clearlydefined_dict)
+        assert cache.get("foo") == clearlydefined_dict
+
+    with DefinitionsCache(tmp_path) as cache:
+        assert cache.get("foo") == clearlydefined_dict
+
+
+def test_cache_expired(tmp_path, clearlydefined_dict):
+    with DefinitionsCache(tmp_path, ttl=60) as cache:
+        cache.set("foo", clearlydefined_dict)
+        cache.ttl = -1
+        assert cache.get("foo") is None
+
+
+def test_cache_evicts_least_recently_used(mocker, tmp_path):
+    cache = DefinitionsCache(tmp_path, max_entries=2)
+    now = time.time()
+    for i, url in enumerate(["foo", "bar", "baz"]):
+        mocker.patch("time.time", return_value=now + i)
+        cache.set(url, {})
+    mocker.patch("time.time", return_value=now + 3)
+    cache.get("foo")
+
+    cache.prune()
+    assert len(cache) == 2
+    assert cache.get("foo") is not None
+    assert cache.get("bar") is None
+    cache.close()
+
+
+def test_client_warm_cache(mocker, tmp_path, clearlydefined_dict):
+    dependencies = [Dependency("a", "b", "c"), Dependency("d", "e", "f")]
+    response = dumps(
+        {
+            clearlydefined_coordinates(dependency): clearlydefined_dict
+            for dependency in dependencies
+        }
+    )
+    mocker.patch(
+        "requests.Session.post", return_value=MockResponse(response, 200)
+    )
+    mocker.patch("requests.Session.get", side_effect=AssertionError())
+
+    with DefinitionsCache(tmp_path) as cache:
+        client = ClearlyDefinedClient(cache=cache)
+        assert len(client.bulk_definitions(dependencies)) == 2
+        assert requests.Session.post.call_count == 1
+
+        assert len(client.bulk_definitions(dependencies)) == 2
+        # Only the parts of the definitions that the checks need are cached.
+        assert (
+            client.definitions(dependencies[0])
+            == ClearlyDefinedDefinitions(clearlydefined_dict).as_dict()
+        )
+        assert requests.Session.post.call_count == 1
+
+
+def test_client_does_not_cache_empty(mocker, tmp_path):
+    mocker.patch("requests.Session.get", return_value=MockResponse("{}", 200))
+
+    with DefinitionsCache(tmp_path) as cache:
+        client = ClearlyDefinedClient(cache=cache)
+        client.definitions(Dependency("a", "b", "c"))
+        assert not len(cache)
+
+
+def test_cache_lookup_stale(tmp_path, clearlydefined_dict):
+    with DefinitionsCache(tmp_path) as cache:
+        cache.set("foo", clearlydefined_dict, etag='"123"')
+        cache.ttl = -1
+        entry = cache.lookup("foo")
+        assert not entry.fresh
+        assert entry.etag == '"123"'
+        assert entry.json_dict == clearlydefined_dict
+
+        cache.ttl = 60
+        cache.refresh("foo")
+        assert cache.lookup("foo").fresh
+
+
+def test_client_revalidates(mocker, tmp_path, clearlydefined_json):
+    dependency = Dependency("a", "b", "c")
+    mocker.patch(
+        "requests.Session.get",
+        return_value=MockResponse(
+            clearlydefined_json,
+            200,
+            headers={
+                "ETag": '"123"',
+                "Last-Modified": "Sat, 07 Dec 2019 02:20:44 GMT",
+            },
+        ),
+    )
+
+    with DefinitionsCache(tmp_path) as cache:
+        client = ClearlyDefinedClient(cache=cache)
+        json_dict = client.definitions(dependency)
+        cache.ttl = -1
+
+        requests.Session.get.return_value = MockResponse(None, 304)
+        assert (
+            client.definitions(dependency)
+            == ClearlyDefinedDefinitions(json_dict).as_dict()
+        )
+        headers = requests.Session.get.call_args[1]["headers"]
+        assert headers["If-None-Match"] == '"123"'
+        assert headers["If-Modified-Since"] == "Sat, 07 Dec 2019 02:20:44 GMT"
+
+
+def test_client_bulk_leaves_revalidation(
+    mocker, tmp_path, clearlydefined_dict
+):
+    """Expired entries with validators are not requested in bulk, so that
+    they can be revalidated one by one.
+    """
+    validated, unvalidated = (
+        Dependency("a", "b", "c"),
+        Dependency("d", "e", "f"),
+    )
+    refetched = dict(clearlydefined_dict, scores={"effective": 100})
+    mocker.patch(
+        "requests.Session.post",
+        return_value=MockResponse(
+            dumps({clearlydefined_coordinates(unvalidated): refetched}), 200,
+        ),
+    )
+    mocker.patch("requests.Session.get", side_effect=AssertionError())
+
+    with DefinitionsCache(tmp_path) as cache:
+        cache.set(
+            clearlydefined_url(validated), clearlydefined_dict, etag='"123"'
+        )
+        cache.set(clearlydefined_url(unvalidated), clearlydefined_dict)
+        cache.ttl = -1
+        client = ClearlyDefinedClient(cache=cache)
+        result = client.bulk_definitions([validated, unvalidated])
+        assert list(result) == [unvalidated]
+        assert result[unvalidated].score == 100
+        assert requests.Session.post.call_args[1]["json"] == [
+            clearlydefined_coordinates(unvalidated)
+        ]
+
+        mocker.patch(
+            "requests.Session.get", return_value=MockResponse(None, 304)
+        )
+        client.definitions(validated)
+        headers = requests.Session.get.call_args[1]["headers"]
+        assert headers["If-None-Match"] == '"123"'
+        assert cache.lookup(clearlydefined_url(validated)).etag == '"123"'
@@ -8,10 +8,12 @@ from requests import RequestException
 
 from liferay_inbound_checker.check import (
     LicenseWhitelistedCheck,
+    RequestExceptionReason,
     ScoreCheck,
     check,
 )
 from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.retry import Retry
 
 
 class ScoreMock:
@@ -89,3 +91,33 @@ def test_check_simple(mocker, clearlydefined_dict):
 
     result = check(Dependency("a", "b", "c"))
     assert result.success
+
+
+def test_check_prefetched(mocker, clearlydefined_definitions):
+    mocker.patch(
+        "liferay_inbound_checker.check.definitions_from_clearlydefined",
+        side_effect=RequestException(),
+    )
+    dependency = Dependency("a", "b", "c")
+
+    result = check(
+        dependency, prefetched={dependency: clearlydefined_definitions}
+    )
+    assert not result.success
+    assert not any(
+        isinstance(reason, RequestExceptionReason) for reason in result.reasons
+    )
+
+
+def test_check_records_retries(mocker, clearlydefined_dict):
+    def definitions(dependency, client=None, on_retry=None):
+        on_retry(Retry("https://example.com", 1, 429, 1.0))
+        return clearlydefined_dict
+
+    mocker.patch(
+        "liferay_inbound_checker.check.definitions_from_clearlydefined",
+        side_effect=definitions,
+    )
+
+    result = check(Dependency("a", "b", "c"))
+    assert len(result.retries) == 1
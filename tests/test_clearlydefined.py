@@ -4,28 +4,39 @@
 
 """Tests for interaction with ClearlyDefined."""
 
+import pickle
+from json import dumps
 
 import pytest
+import requests
 from requests import RequestException
 
+from liferay_inbound_checker import clearlydefined
 from liferay_inbound_checker.clearlydefined import (
+    ClearlyDefinedClient,
     ClearlyDefinedDefinitions,
+    bulk_definitions_from_clearlydefined,
+    clearlydefined_coordinates,
     definitions_from_clearlydefined,
+    license_keys,
 )
 from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.retry import DEFAULT_RETRIES
 
 
 class MockResponse:
     """Super simple mocked version of Response."""
 
-    def __init__(self, text=None, status_code=None):
+    def __init__(self, text=None, status_code=None, headers=None):
         self.text = text
         self.status_code = status_code
+        self.headers = headers if headers is not None else {}
 
 
 def test_definitions_simple(mocker, clearlydefined_json, clearlydefined_dict):
     mocker.patch(
-        "requests.get", return_value=MockResponse(clearlydefined_json, 200)
+        "requests.Session.get",
+        return_value=MockResponse(clearlydefined_json, 200),
     )
 
     assert (
@@ -35,19 +46,151 @@ def test_definitions_simple(mocker, clearlydefined_json, clearlydefined_dict):
 
 
 def test_definitions_exception(mocker):
-    mocker.patch("requests.get", side_effect=RequestException())
+    mocker.patch("requests.Session.get", side_effect=RequestException())
+    mocker.patch("time.sleep")
 
     with pytest.raises(RequestException):
         definitions_from_clearlydefined(Dependency("a", "b", "c"))
+    assert requests.Session.get.call_count == DEFAULT_RETRIES + 1
+
+
+def test_definitions_retry(mocker, clearlydefined_json):
+    mocker.patch(
+        "requests.Session.get",
+        side_effect=[
+            MockResponse("Slow down", 429, headers={"Retry-After": "2"}),
+            MockResponse("Oops", 503),
+            MockResponse(clearlydefined_json, 200),
+        ],
+    )
+    mocker.patch("time.sleep")
+    retries = []
+
+    definitions_from_clearlydefined(
+        Dependency("a", "b", "c"),
+        client=ClearlyDefinedClient(),
+        on_retry=retries.append,
+    )
+    assert [retry.cause for retry in retries] == [429, 503]
+    assert retries[0].delay == 2
 
 
 def test_definitions_bad_status_code(mocker):
-    mocker.patch("requests.get", return_value=MockResponse("Error", 404))
+    mocker.patch(
+        "requests.Session.get", return_value=MockResponse("Error", 404)
+    )
 
     with pytest.raises(RequestException):
         definitions_from_clearlydefined(Dependency("a", "b", "c"))
 
 
+def test_client_reuses_session(mocker, clearlydefined_json):
+    mocker.patch(
+        "requests.Session.get",
+        return_value=MockResponse(clearlydefined_json, 200),
+    )
+
+    with ClearlyDefinedClient(timeout=5) as client:
+        definitions_from_clearlydefined(Dependency("a", "b", "c"), client)
+        definitions_from_clearlydefined(Dependency("d", "e", "f"), client)
+    assert requests.Session.get.call_count == 2
+    for call in requests.Session.get.call_args_list:
+        assert call[1]["timeout"] == 5
+
+
+def test_bulk_definitions_simple(mocker, clearlydefined_dict):
+    dependencies = [Dependency("a", "b", "c"), Dependency("d", "e", "f")]
+    response = dumps(
+        {
+            clearlydefined_coordinates(dependency): clearlydefined_dict
+            for dependency in dependencies
+        }
+    )
+    mocker.patch(
+        "requests.Session.post", return_value=MockResponse(response, 200)
+    )
+
+    result = bulk_definitions_from_clearlydefined(dependencies)
+    assert set(result) == set(dependencies)
+    assert all(definitions.score == 80 for definitions in result.values())
+
+
+def test_bulk_definitions_chunks(mocker):
+    mocker.patch("requests.Session.post", return_value=MockResponse("{}", 200))
+
+    dependencies = [Dependency("a", "b", str(i)) for i in range(5)]
+    bulk_definitions_from_clearlydefined(dependencies, chunk_size=2)
+    assert requests.Session.post.call_count == 3
+
+
+def test_bulk_definitions_partial_failure(mocker, clearlydefined_dict):
+    """A chunk that is rejected because of a single bad coordinate is split
+    up until the bad coordinate is isolated.
+    """
+    bad = Dependency("bad", "bad", "bad")
+
+    def post(url, json=None, timeout=None):
+        if clearlydefined_coordinates(bad) in json:
+            return MockResponse("Bad request", 400)
+        return MockResponse(
+            dumps({coordinate: clearlydefined_dict for coordinate in json}),
+            200,
+        )
+
+    mocker.patch("requests.Session.post", side_effect=post)
+
+    dependencies = [Dependency("a", "b", str(i)) for i in range(3)] + [bad]
+    result = bulk_definitions_from_clearlydefined(dependencies)
+    assert set(result) == set(dependencies) - {bad}
+
+
+def test_bulk_definitions_exception(mocker):
+    mocker.patch("requests.Session.post", side_effect=RequestException())
+    mocker.patch("time.sleep")
+
+    assert not bulk_definitions_from_clearlydefined(
+        [Dependency("a", "b", "c")]
+    )
+
+
+def test_bulk_chunks_retries(mocker, clearlydefined_dict):
+    dependencies = [Dependency("a", "b", "c"), Dependency("d", "e", "f")]
+    response = dumps(
+        {
+            clearlydefined_coordinates(dependency): clearlydefined_dict
+            for dependency in dependencies
+        }
+    )
+    mocker.patch(
+        "requests.Session.post",
+        side_effect=[MockResponse("Oops", 503), MockResponse(response, 200)],
+    )
+    mocker.patch("time.sleep")
+
+    (chunk,) = ClearlyDefinedClient().bulk_chunks(dependencies)
+    assert [item.dependency for item in chunk] == dependencies
+    for item in chunk:
+        assert item.definitions.score == 80
+        assert [retry.cause for retry in item.retries] == [503]
+        assert item.error is None
+
+
+def test_bulk_chunks_failed(mocker):
+    """A chunk that still fails after all retries fails as a whole."""
+    mocker.patch("requests.Session.post", return_value=MockResponse("", 503))
+    mocker.patch("requests.Session.get", side_effect=AssertionError())
+    mocker.patch("time.sleep")
+
+    dependencies = [Dependency("a", "b", str(i)) for i in range(3)]
+    chunks = list(ClearlyDefinedClient().bulk_chunks(dependencies))
+    assert requests.Session.post.call_count == DEFAULT_RETRIES + 1
+    assert [item.dependency for item in chunks[0]] == dependencies
+    for item in chunks[0]:
+        assert item.definitions is None
+        assert "503" in item.error
+        assert len(item.retries) == DEFAULT_RETRIES
+
+
 def test_score(clearlydefined_definitions):
     assert clearlydefined_definitions.score == 80
 
@@ -110,6 +253,76 @@ def test_discovered_licenses_parse_error():
     }
 
 
+def test_definitions_are_trimmed(clearlydefined_definitions):
+    assert not hasattr(clearlydefined_definitions, "__dict__")
+    assert clearlydefined_definitions.as_dict() == {
+        "described": {
+            "hashes": {"sha1": "a77a18fa425eba9c55447fa0711e2dbfbf71907b"}
+        },
+        "licensed": {
+            "declared": "Apache-2.0",
+            "facets": {
+                "core": {
+                    "discovered": {
+                        "expressions": ["Apache-2.0 AND BSD-3-Clause"]
+                    }
+                }
+            },
+        },
+        "scores": {"effective": 80},
+    }
+
+
+def test_as_dict_round_trip(clearlydefined_definitions):
+    result = ClearlyDefinedDefinitions(clearlydefined_definitions.as_dict())
+    assert result.as_dict() == clearlydefined_definitions.as_dict()
+    assert (
+        result.discovered_license_expressions
+        == clearlydefined_definitions.discovered_license_expressions
+    )
+
+
+def test_score_missing():
+    with pytest.raises(KeyError):
+        ClearlyDefinedDefinitions(dict()).score
+
+
+def test_pickle_missing_parts():
+    definitions = pickle.loads(
+        pickle.dumps(ClearlyDefinedDefinitions({"licensed": {}}))
+    )
+    assert definitions.is_empty()
+    assert definitions.discovered_license_expressions == set()
+    with pytest.raises(KeyError):
+        definitions.score
+
+
+def test_discovered_licenses_cached(mocker, clearlydefined_definitions):
+    spy = mocker.spy(clearlydefined, "license_keys")
+    first = clearlydefined_definitions.discovered_licenses
+    first.add("WTFPL")
+    assert clearlydefined_definitions.discovered_licenses == {
+        "Apache-2.0",
+        "BSD-3-Clause",
+    }
+    assert spy.call_count == 2
+
+
+def test_license_keys_memoized():
+    license_keys.cache_clear()
+    license_keys("MIT AND BSD-3-Clause")
+    assert license_keys("MIT AND BSD-3-Clause") == {"MIT", "BSD-3-Clause"}
+    assert license_keys.cache_info().hits == 1
+
+
+def test_license_keys_parse_error_keeps_or_later():
+    assert license_keys("GPL-2.0-or-later WITH (OTHER or MIT") == {
+        "GPL-2.0-or-later",
+        "OTHER",
+        "MIT",
+    }
+
+
 def test_is_empty():
     definitions = ClearlyDefinedDefinitions(dict())
     assert definitions.is_empty()
@@ -0,0 +1,253 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for checking dependencies from the command line."""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from liferay_inbound_checker import cli
+from liferay_inbound_checker.check import Result, ScoreTooLowReason
+from liferay_inbound_checker.clearlydefined import (
+    BulkResult,
+    ClearlyDefinedClient,
+)
+from liferay_inbound_checker.cli import check_dependencies
+from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.results import ResultCache
+from liferay_inbound_checker.retry import RetryPolicy
+
+from .fakeserver import FakeClearlyDefinedServer
+
+
+def _bulk_chunks(dependencies, **kwargs):
+    for dependency in dependencies:
+        yield [BulkResult(dependency, None, [], None)]
+
+
+@pytest.fixture()
+def slow_check(mocker):
+    """Mock check, in which dependencies with version 'slow' only complete
+    after all other dependencies, and dependencies with version 'bad' fail.
+    """
+    mocker.patch(
+        "liferay_inbound_checker.cli.bulk_chunks_from_clearlydefined",
+        side_effect=_bulk_chunks,
+    )
+    others_done = threading.Event()
+
+    def check(dependency, **kwargs):
+        if dependency.version == "slow":
+            assert others_done.wait(5)
+        else:
+            others_done.set()
+        result = Result(dependency)
+        result.success = dependency.version != "bad"
+        if not result.success:
+            result.reasons = [ScoreTooLowReason(10)]
+        return result
+
+    return mocker.patch("liferay_inbound_checker.cli.check", side_effect=check)
+
+
+def _result(dependency):
+    result = Result(dependency)
+    result.success = True
+    return result
+
+
+def _printed_dependencies(output):
+    return [line for line in output.splitlines() if "@" in line]
+
+
+def test_check_dependencies_completion_order(slow_check, capsys):
+    dependencies = [Dependency("a", "b", "slow"), Dependency("c", "d", "ok")]
+    assert check_dependencies(dependencies, None, client=object())
+    output = capsys.readouterr().out
+    assert _printed_dependencies(output) == ["c/d@ok", "a/b@slow"]
+    assert "Successful dependencies: 2" in output
+
+
+def test_check_dependencies_grouped(slow_check, capsys):
+    dependencies = [
+        Dependency("e", "f", "ok"),
+        Dependency("a", "b", "slow"),
+        Dependency("c", "d", "bad"),
+    ]
+    assert not check_dependencies(
+        dependencies, None, client=object(), grouped=True
+    )
+    output = capsys.readouterr().out
+    assert _printed_dependencies(output) == ["c/d@bad", "a/b@slow", "e/f@ok"]
+    assert "Failed dependencies: 1" in output
+
+
+def test_check_dependencies_max_failures(slow_check, capsys):
+    dependencies = [Dependency("a", "b", "slow"), Dependency("c", "d", "bad")]
+    assert not check_dependencies(
+        dependencies, None, client=object(), max_failures=1
+    )
+    output = capsys.readouterr().out
+    assert _printed_dependencies(output) == ["c/d@bad"]
+    assert "Failed dependencies: 1" in output
+    assert "Unchecked dependencies: 1" in output
+
+
+def test_check_dependencies_max_failures_stops_requests(
+    clearlydefined_dict, capsys
+):
+    """Once the failure budget is spent, no more chunks are requested."""
+    dependencies = [Dependency("a", "b", str(i)) for i in range(1000)]
+    with FakeClearlyDefinedServer(clearlydefined_dict, latency=0.2) as server:
+        with ClearlyDefinedClient(base_url=server.url) as client:
+            assert not check_dependencies(
+                dependencies,
+                None,
+                client=client,
+                chunk_size=100,
+                max_failures=1,
+            )
+        # The chunk that was in flight when the run stopped completes.
+        assert server.requests <= 2
+    output = capsys.readouterr().out
+    assert "Failed dependencies: 1" in output
+    assert "Unchecked dependencies: 999" in output
+
+
+def test_check_dependencies_max_failures_slow_check(
+    clearlydefined_dict, mocker
+):
+    """The prefetch does not run ahead of checks that take a while."""
+    dependencies = [Dependency("a", "b", str(i)) for i in range(200)]
+
+    def check(dependency, **kwargs):
+        time.sleep(0.1)
+        result = Result(dependency)
+        result.success = dependency.version != "4"
+        return result
+
+    mocker.patch("liferay_inbound_checker.cli.check", side_effect=check)
+    with FakeClearlyDefinedServer(clearlydefined_dict) as server:
+        with ClearlyDefinedClient(base_url=server.url) as client:
+            assert not check_dependencies(
+                dependencies,
+                None,
+                client=client,
+                chunk_size=10,
+                max_failures=1,
+                workers=1,
+            )
+        assert server.bulk_requests <= 2
+
+
+def test_check_dependencies_async_skips_bulk(clearlydefined_dict):
+    pytest.importorskip("aiohttp")
+    dependencies = [Dependency("a", "b", str(i)) for i in range(5)]
+    with FakeClearlyDefinedServer(clearlydefined_dict) as server:
+        with ClearlyDefinedClient(base_url=server.url) as client:
+            check_dependencies(
+                dependencies, None, client=client, backend="async"
+            )
+        assert not server.bulk_requests
+        assert server.requests == len(dependencies)
+
+
+def test_check_dependencies_uses_result_cache(tmp_path, mocker):
+    dependencies = [Dependency("a", "b", "c"), Dependency("d", "e", "f")]
+    mocker.patch(
+        "liferay_inbound_checker.cli.bulk_chunks_from_clearlydefined",
+        side_effect=_bulk_chunks,
+    )
+    check = mocker.patch(
+        "liferay_inbound_checker.cli.check",
+        side_effect=lambda dependency, **kwargs: _result(dependency),
+    )
+    with ResultCache(tmp_path) as cache:
+        assert check_dependencies(
+            dependencies[:1], None, client=object(), result_cache=cache
+        )
+        assert check_dependencies(
+            dependencies, None, client=object(), result_cache=cache
+        )
+    checked = [call[0][0] for call in check.call_args_list]
+    assert checked == dependencies
+
+
+def test_check_dependencies_auto_workers(mocker, capsys):
+    dependencies = [Dependency("a", "b", str(i)) for i in range(20)]
+    mocker.patch(
+        "liferay_inbound_checker.cli.bulk_chunks_from_clearlydefined",
+        side_effect=_bulk_chunks,
+    )
+    mocker.patch(
+        "liferay_inbound_checker.cli.check",
+        side_effect=lambda dependency, **kwargs: _result(dependency),
+    )
+    assert check_dependencies(
+        dependencies, None, client=object(), workers=None
+    )
+    output = capsys.readouterr().out
+    assert len(_printed_dependencies(output)) == len(dependencies)
+    assert "Tuned the amount of workers to" in output
+
+
+def test_cli_imports_heavy_modules_lazily():
+    """Starting the command line interface does not import the modules that
+    are only needed to check dependencies.
+    """
+    heavy = ["requests", "license_expression", "yaml", "aiohttp"]
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, liferay_inbound_checker.cli;"
+            f" print([name for name in {heavy!r} if name in sys.modules])",
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_check_dependencies_failed_chunk(clearlydefined_dict, capsys):
+    """A chunk that fails after all retries fails its dependencies, without
+    requesting their definitions one by one.
+    """
+    dependencies = [Dependency("a", "b", str(i)) for i in range(3)]
+    with FakeClearlyDefinedServer(
+        clearlydefined_dict, error_rate=1.0
+    ) as server:
+        client = ClearlyDefinedClient(
+            base_url=server.url, retry_policy=RetryPolicy(2, backoff=0)
+        )
+        with client:
+            assert not check_dependencies(dependencies, None, client=client)
+        assert server.requests == 3
+    output = capsys.readouterr().out
+    assert "Failed dependencies: 3" in output
+    assert "Retried requests: 2" in output
+
+
+@pytest.mark.parametrize("force", [False, True])
+def test_delta_dependencies_same_pom_inputs(tmp_path, mocker, force):
+    mocker.patch.object(cli, "resolve_revision", return_value="0" * 40)
+    mocker.patch.object(cli, "same_pom_inputs", return_value=True)
+    mocker.patch.object(cli, "changed_dependencies", return_value=set())
+    mocker.patch.object(cli, "check_dependencies", return_value=True)
+
+    args = ["--cache-dir", str(tmp_path)]
+    if force:
+        args.append("--force-regenerate")
+    result = CliRunner().invoke(
+        cli.main, args + ["delta-dependencies", str(tmp_path)]
+    )
+    assert result.exit_code == 0, result.output
+    assert cli.changed_dependencies.called == force
+    assert ("have not changed" in result.output) != force
@@ -4,9 +4,13 @@
 
 """Tests for extracting dependencies."""
 
+from inspect import cleandoc
+from io import StringIO
+
 from liferay_inbound_checker.dependencies import (
     Dependency,
     dependencies_from_tree,
+    iter_dependencies,
 )
 
 
@@ -21,3 +25,55 @@ def test_extract_dependencies(sample_pom_root):
         ),
         Dependency("org.springframework", "spring-context", "5.2.2.RELEASE"),
     ]
+
+
+def test_iter_dependencies(sample_pom, tmp_path):
+    """Given a sample pom, stream the dependencies from it."""
+    expected = [
+        Dependency("org.springframework", "spring-context", "5.2.2.RELEASE"),
+        Dependency(
+            "com.liferay",
+            "com.fasterxml.jackson.databind",
+            "2.10.3.LIFERAY-PATCHED-1",
+        ),
+    ]
+    assert list(iter_dependencies(StringIO(sample_pom))) == expected
+
+    path = tmp_path / "pom.xml"
+    path.write_text(sample_pom)
+    assert list(iter_dependencies(path)) == expected
+
+
+def test_iter_dependencies_ignores_other_dependencies():
+    """Only dependencies in dependencyManagement are yielded."""
+    pom = cleandoc(
+        """
+        <project>
+          <dependencies>
+            <dependency>
+              <groupId>a</groupId>
+              <artifactId>b</artifactId>
+              <version>c</version>
+            </dependency>
+          </dependencies>
+          <dependencyManagement>
+            <dependencies>
+              <dependency>
+                <groupId>d</groupId>
+                <artifactId>e</artifactId>
+                <version>f</version>
+                <exclusions>
+                  <exclusion>
+                    <groupId>g</groupId>
+                    <artifactId>h</artifactId>
+                  </exclusion>
+                </exclusions>
+              </dependency>
+            </dependencies>
+          </dependencyManagement>
+        </project>
+        """
+    )
+    assert list(iter_dependencies(StringIO(pom))) == [
+        Dependency("d", "e", "f")
+    ]
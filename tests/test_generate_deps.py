@@ -8,7 +8,17 @@ import os
 import subprocess
 from pathlib import Path
 
-from liferay_inbound_checker.dependencies import convert_to_tree, generate_pom
+import pytest
+
+from liferay_inbound_checker.dependencies import (
+    POM_PATH,
+    convert_to_tree,
+    generate_pom,
+    pom_inputs_digest,
+    resolve_revision,
+    revision_pom_inputs_digest,
+    worktree,
+)
 
 
 def test_generate_pom(mocker):
@@ -17,10 +27,12 @@ def test_generate_pom(mocker):
     mocker.patch("pathlib.Path.read_text", return_value="Hello, world!")
 
     result = generate_pom(Path.home())
-    os.chdir.assert_any_call(f"{Path.home()}/modules")
-    os.chdir.assert_called_with(f"{Path.cwd()}")
+    os.chdir.assert_not_called()
     subprocess.run.assert_called_with(
-        ["../gradlew", "-b", "releng.gradle", "generatePomThirdParty"]
+        ["../gradlew", "-b", "releng.gradle", "generatePomThirdParty"],
+        cwd=f"{Path.home()}/modules",
+        stderr=subprocess.PIPE,
+        check=True,
     )
     Path.read_text.assert_called()
     assert result == "Hello, world!"
@@ -31,3 +43,129 @@ def test_convert_to_tree(sample_pom):
     assert root.tag == "project"
     dependencies = root.find("dependencyManagement").find("dependencies")
     assert len(dependencies) == 2
+
+
+@pytest.fixture()
+def portal(tmp_path, mocker):
+    """A fake Portal directory in which running Gradle writes a POM."""
+    portal = tmp_path / "portal"
+    (portal / "modules/apps/foo").mkdir(parents=True)
+    (portal / "modules/build").mkdir()
+    (portal / "modules/releng.gradle").write_text("releng")
+    (portal / "modules/apps/foo/build.gradle").write_text("foo")
+
+    def run(*args, **kwargs):
+        (portal / POM_PATH).write_text(f"POM {run.count}")
+        run.count += 1
+
+    run.count = 0
+    mocker.patch("subprocess.run", side_effect=run)
+    return portal
+
+
+def test_pom_inputs_digest(portal):
+    digest = pom_inputs_digest(portal)
+    (portal / "modules/apps/foo/README").write_text("not an input")
+    (portal / "modules/build/build.gradle").write_text("ignored")
+    assert pom_inputs_digest(portal) == digest
+
+    (portal / "modules/apps/foo/build.gradle").write_text("changed")
+    assert pom_inputs_digest(portal) != digest
+
+
+def test_generate_pom_cached(portal, tmp_path):
+    cache_dir = tmp_path / "cache"
+    assert generate_pom(portal, cache_dir=cache_dir) == "POM 0"
+    assert generate_pom(portal, cache_dir=cache_dir) == "POM 0"
+    assert subprocess.run.call_count == 1
+
+    assert generate_pom(portal, cache_dir=cache_dir, force=True) == "POM 1"
+    assert subprocess.run.call_count == 2
+
+    (portal / "modules/apps/foo/build.gradle").write_text("changed")
+    assert generate_pom(portal, cache_dir=cache_dir) == "POM 2"
+    assert subprocess.run.call_count == 3
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_generate_pom_failed(portal, tmp_path):
+    cache_dir = tmp_path / "cache"
+    (portal / POM_PATH).write_text("Stale POM")
+    subprocess.run.side_effect = subprocess.CalledProcessError(
+        1, "gradlew", stderr=b"BUILD FAILED"
+    )
+    with pytest.raises(subprocess.CalledProcessError):
+        generate_pom(portal, cache_dir=cache_dir)
+    assert not cache_dir.exists() or not list(cache_dir.iterdir())
+
+
+def _git(directory, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=a", "-c", "user.email=a@example.com"]
+        + list(args),
+        cwd=str(directory),
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.fixture()
+def repository(tmp_path):
+    """A Git repository with a commit tagged 'base' and a later commit."""
+    repository = tmp_path / "repository"
+    repository.mkdir()
+    _git(repository, "init", "-q")
+    (repository / "file").write_text("base")
+    _git(repository, "add", "file")
+    _git(repository, "commit", "-q", "-m", "base")
+    _git(repository, "tag", "base")
+    (repository / "file").write_text("head")
+    _git(repository, "commit", "-q", "-a", "-m", "head")
+    return repository
+
+
+def test_worktree(repository):
+    with worktree(repository, "base") as directory:
+        assert (directory / "file").read_text() == "base"
+        assert (repository / "file").read_text() == "head"
+    assert not directory.exists()
+
+    with pytest.raises(subprocess.CalledProcessError):
+        with worktree(repository, "does-not-exist"):
+            pass
+
+
+def test_resolve_revision(repository):
+    base = resolve_revision(repository, "base")
+    assert len(base) == 40
+    assert resolve_revision(repository, "HEAD~1") == base
+    assert resolve_revision(repository, "HEAD") != base
+    with pytest.raises(subprocess.CalledProcessError):
+        resolve_revision(repository, "does-not-exist")
+
+
+def test_revision_pom_inputs_digest(repository):
+    modules = repository / "modules"
+    for path, contents in [
+        ("build.gradle", "root"),
+        ("apps/foo/build.gradle", "foo"),
+        ("apps/foo/README", "not an input"),
+        ("apps/foo/sub/settings.gradle", "sub"),
+        ("apps/foo-bar/gradle.properties", "foo-bar"),
+        ("apps/node_modules/build.gradle", "ignored"),
+        ("releng.gradle", "releng"),
+    ]:
+        (modules / path).parent.mkdir(parents=True, exist_ok=True)
+        (modules / path).write_text(contents)
+    _git(repository, "add", "modules")
+    _git(repository, "commit", "-q", "-m", "modules")
+
+    digest = revision_pom_inputs_digest(repository, "HEAD")
+    assert digest == pom_inputs_digest(repository)
+
+    (modules / "apps/foo/build.gradle").write_text("changed")
+    assert revision_pom_inputs_digest(repository, "HEAD") == digest
+    assert pom_inputs_digest(repository) != digest
+
+    with pytest.raises(subprocess.CalledProcessError):
+        revision_pom_inputs_digest(repository, "base")
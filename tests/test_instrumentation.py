@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for timers and counters."""
+
+import pytest
+
+from liferay_inbound_checker import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def clean_instrumentation():
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_is_noop():
+    assert instrumentation.timer("a") is instrumentation._NULL_TIMER
+    with instrumentation.timer("a"):
+        pass
+    instrumentation.count("b")
+    assert not instrumentation.registry().stats()
+    assert not instrumentation.registry().counter("b")
+
+
+def test_timer_and_count():
+    instrumentation.enable()
+    with instrumentation.timer("phase", phase="check"):
+        pass
+    instrumentation.record("phase", 2.0, phase="check")
+    instrumentation.count("responses", status="200")
+    instrumentation.count("responses", amount=2, status="500")
+
+    registry = instrumentation.registry()
+    stats = registry.stats()[("phase", (("phase", "check"),))]
+    assert stats.count == 2
+    assert stats.maximum == 2.0
+    assert registry.counter("responses", status="500") == 2
+    assert registry.counter_total("responses") == 3
+
+
+def test_percentile():
+    samples = [float(i) for i in range(1, 101)]
+    assert instrumentation.percentile(samples, 0.5) == 50
+    assert instrumentation.percentile(samples, 0.95) == 95
+    assert instrumentation.percentile([], 0.5) == 0
+
+
+def test_hook():
+    calls = []
+    instrumentation.add_hook(lambda *args: calls.append(args))
+    instrumentation.count("a", label="b")
+    assert calls == [("counter", "a", {"label": "b"}, 1)]
+
+
+def test_timed_iter():
+    instrumentation.enable()
+    items = instrumentation.timed_iter("parse", iter([1, 2, 3]))
+    assert not instrumentation.registry().stats()
+    assert list(items) == [1, 2, 3]
+    assert instrumentation.registry().stats()[("parse", ())].count == 1
+
+
+def test_format_summary():
+    instrumentation.enable()
+    instrumentation.record("phase", 1.5, phase="total")
+    instrumentation.count("cache.lookups", outcome="hit")
+    instrumentation.count("cache.lookups", outcome="miss")
+    summary = "\n".join(instrumentation.format_summary())
+    assert "phase{phase=total}" in summary
+    assert "1.500s" in summary
+    assert "Cache hit rate: 50.0% of 2" in summary
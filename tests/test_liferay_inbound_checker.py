@@ -7,8 +7,23 @@
 import pytest
 from click.testing import CliRunner
 
-from liferay_inbound_checker import cli, liferay_inbound_checker
+from liferay_inbound_checker import atomic_write, cli, liferay_inbound_checker
 
 
 def test_command_line_interface():
     """Test the CLI."""
+
+
+def test_atomic_write(tmp_path):
+    path = tmp_path / "file"
+    with atomic_write(path) as fp:
+        fp.write("Hello")
+        assert not path.exists()
+    assert path.read_text() == "Hello"
+
+    with pytest.raises(ValueError):
+        with atomic_write(path) as fp:
+            fp.write("Partial")
+            raise ValueError()
+    assert path.read_text() == "Hello"
+    assert list(tmp_path.iterdir()) == [path]
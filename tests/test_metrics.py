@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for the export of metrics."""
+
+import pytest
+
+from liferay_inbound_checker import instrumentation
+from liferay_inbound_checker.check import (
+    NotWhitelistedLicenseReason,
+    Result,
+    ScoreTooLowReason,
+)
+from liferay_inbound_checker.clearlydefined import BulkResult
+from liferay_inbound_checker.cli import check_dependencies
+from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.metrics import format_metrics, write_metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_instrumentation():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_format_metrics_histogram():
+    for seconds in [0.003, 0.2, 20]:
+        instrumentation.record(
+            "clearlydefined.requests", seconds, endpoint="definitions"
+        )
+    lines = format_metrics(buckets=[0.01, 1])
+    prefix = "liferay_inbound_checker_clearlydefined_requests_seconds"
+    labels = 'endpoint="definitions"'
+    assert lines == [
+        f"# TYPE {prefix} histogram",
+        f'{prefix}_bucket{{{labels},le="0.01"}} 1',
+        f'{prefix}_bucket{{{labels},le="1.0"}} 2',
+        f'{prefix}_bucket{{{labels},le="+Inf"}} 3',
+        f"{prefix}_count{{{labels}}} 3",
+        f"{prefix}_sum{{{labels}}} 20.203",
+    ]
+
+
+def test_format_metrics_phases_and_counters():
+    instrumentation.record("phase", 1.5, phase="check")
+    instrumentation.count("cache.lookups", outcome="hit")
+    instrumentation.count("cache.lookups", outcome="miss")
+    instrumentation.count("cache.lookups", outcome="miss")
+    assert format_metrics() == [
+        "# TYPE liferay_inbound_checker_phase_seconds gauge",
+        'liferay_inbound_checker_phase_seconds{phase="check"} 1.5',
+        "# TYPE liferay_inbound_checker_cache_lookups_total counter",
+        'liferay_inbound_checker_cache_lookups_total{outcome="hit"} 1',
+        'liferay_inbound_checker_cache_lookups_total{outcome="miss"} 2',
+    ]
+
+
+def test_format_metrics_escapes_labels():
+    instrumentation.count("a", label='"\\\n')
+    assert 'liferay_inbound_checker_a_total{label="\\"\\\\\\n"} 1' in (
+        format_metrics()
+    )
+
+
+def test_write_metrics_results_by_reason(tmp_path, mocker):
+    def check(dependency, **kwargs):
+        result = Result(dependency)
+        result.success = dependency.version == "ok"
+        if not result.success:
+            result.reasons = [
+                ScoreTooLowReason(10),
+                NotWhitelistedLicenseReason("GPL-3.0-only"),
+            ]
+        return result
+
+    mocker.patch(
+        "liferay_inbound_checker.cli.bulk_chunks_from_clearlydefined",
+        side_effect=lambda dependencies, **kwargs: (
+            [BulkResult(dependency, None, [], None)]
+            for dependency in dependencies
+        ),
+    )
+    mocker.patch("liferay_inbound_checker.cli.check", side_effect=check)
+    dependencies = [Dependency("a", "b", "ok"), Dependency("c", "d", "bad")]
+    check_dependencies(dependencies, None, client=object())
+
+    path = tmp_path / "checker.prom"
+    write_metrics(path)
+    text = path.read_text()
+    assert 'liferay_inbound_checker_results_total{outcome="success"} 1' in text
+    assert 'liferay_inbound_checker_results_total{outcome="failure"} 1' in text
+    assert (
+        'liferay_inbound_checker_reasons_total{reason="ScoreTooLowReason"} 1'
+        in text
+    )
+    assert 'reason="NotWhitelistedLicenseReason"} 1' in text
+    assert 'liferay_inbound_checker_phase_seconds{phase="check"}' in text
+    assert "# EOF" not in text
+    assert "# UNIT" not in text
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for checking dependencies in pools of workers."""
+
+import click
+import pytest
+
+from liferay_inbound_checker.check import ScoreCheck, Whitelist
+from liferay_inbound_checker.clearlydefined import (
+    ClearlyDefinedClient,
+    ClearlyDefinedDefinitions,
+)
+from liferay_inbound_checker.cli import WorkersType
+from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.pools import (
+    MAX_WORKERS,
+    check_in_processes,
+    optimal_workers,
+)
+
+from .fakeserver import FakeClearlyDefinedServer
+
+
+@pytest.fixture()
+def fake_server(clearlydefined_dict):
+    clearlydefined_dict["scores"]["effective"] = ScoreCheck.TARGET_NUMBER
+    with FakeClearlyDefinedServer(clearlydefined_dict) as server:
+        yield server
+
+
+def test_optimal_workers():
+    assert optimal_workers(1.0, 1.0) == 1
+    assert optimal_workers(1.0, 0.1) == 10
+    assert optimal_workers(1.0, 0.1, cpus=4) == 40
+    assert optimal_workers(1.0, 0.0) == MAX_WORKERS
+    assert optimal_workers(100.0, 0.1) == MAX_WORKERS
+    assert optimal_workers(0.5, 1.0) == 1
+
+
+def test_workers_type():
+    workers_type = WorkersType()
+    assert workers_type.convert("8", None, None) == 8
+    assert workers_type.convert("auto", None, None) is None
+    for value in ["0", "-1", "many"]:
+        with pytest.raises(click.BadParameter):
+            workers_type.convert(value, None, None)
+
+
+def test_check_in_processes(fake_server, clearlydefined_dict):
+    dependencies = [Dependency("a", "b", str(i)) for i in range(10)]
+    whitelist = Whitelist([{"name": "a/b", "version": "0"}])
+    prefetched = {
+        dependencies[1]: ClearlyDefinedDefinitions(clearlydefined_dict)
+    }
+    with ClearlyDefinedClient(base_url=fake_server.url) as client:
+        results = list(
+            check_in_processes(
+                dependencies, whitelist, prefetched, client, workers=2
+            )
+        )
+    assert {result.dependency for result in results} == set(dependencies)
+    assert all(result.success for result in results)
+    assert fake_server.requests == len(dependencies) - 2
+
+
+def test_check_in_processes_missing_parts(fake_server):
+    empty, undeclared = Dependency("a", "b", "0"), Dependency("a", "b", "1")
+    prefetched = {
+        empty: ClearlyDefinedDefinitions({"scores": {"effective": 0}}),
+        undeclared: ClearlyDefinedDefinitions(
+            {"described": {"hashes": {"sha1": "0" * 40}}}
+        ),
+    }
+    with ClearlyDefinedClient(base_url=fake_server.url) as client:
+        results = check_in_processes(
+            [empty], Whitelist(), prefetched, client, workers=1
+        )
+        (result,) = results
+        assert result.empty_definitions
+        assert not result.success
+
+        # Like in the thread backend, a missing score is a KeyError, not a
+        # TypeError from passing the missing declared license on.
+        with pytest.raises(KeyError):
+            list(
+                check_in_processes(
+                    [undeclared], Whitelist(), prefetched, client, workers=1
+                )
+            )
+    assert fake_server.requests == 0
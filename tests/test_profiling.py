@@ -0,0 +1,51 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for profiling runs."""
+
+import pstats
+import threading
+import time
+
+from liferay_inbound_checker.profiling import SamplingProfiler, ThreadProfiler
+
+
+def _work_in_thread(seconds=0.0):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _run_thread(seconds=0.0):
+    thread = threading.Thread(target=_work_in_thread, args=(seconds,))
+    thread.start()
+    thread.join()
+
+
+def test_thread_profiler_covers_threads(tmp_path):
+    profiler = ThreadProfiler()
+    profiler.start()
+    _run_thread()
+    profiler.stop()
+
+    path = tmp_path / "run.pstats"
+    profiler.write(path)
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert "_run_thread" in functions
+    assert "_work_in_thread" in functions
+
+
+def test_sampling_profiler_collapsed_stacks(tmp_path):
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    _run_thread(0.2)
+    profiler.stop()
+
+    path = tmp_path / "run.collapsed"
+    profiler.write(path)
+    lines = path.read_text().splitlines()
+    assert any(
+        "_work_in_thread (" in line and line.split()[-1].isdigit()
+        for line in lines
+    )
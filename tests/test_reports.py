@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for machine-readable reports."""
+
+import json
+from xml.etree.ElementTree import parse
+
+from liferay_inbound_checker.check import (
+    NotWhitelistedLicenseReason,
+    RequestExceptionReason,
+    Result,
+    ScoreTooLowReason,
+)
+from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.reports import JsonLinesReport, JUnitXmlReport
+
+
+def _results():
+    success = Result(Dependency("a", "b", "1"))
+    success.success = True
+    success.duration = 0.5
+    failure = Result(Dependency("c", "d", "2"))
+    failure.success = False
+    failure.reasons = [ScoreTooLowReason(50), NotWhitelistedLicenseReason("<")]
+    error = Result(Dependency("e", "f", "3"))
+    error.success = False
+    error.reasons = [RequestExceptionReason("url", "error")]
+    return [success, failure, error]
+
+
+def test_json_lines_report(tmp_path):
+    path = tmp_path / "report.jsonl"
+    with JsonLinesReport(path) as report:
+        for number, result in enumerate(_results(), start=1):
+            report.write(result)
+            # Every result is flushed right away.
+            assert len(path.read_text().splitlines()) == number
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 3
+    assert lines[0]["dependency"] == {
+        "groupid": "a",
+        "artifactid": "b",
+        "version": "1",
+    }
+    assert lines[0]["success"]
+    assert lines[0]["duration"] == 0.5
+    assert [reason["class"] for reason in lines[1]["reasons"]] == [
+        "ScoreTooLowReason",
+        "NotWhitelistedLicenseReason",
+    ]
+    assert lines[1]["reasons"][0]["attributes"] == {"score": 50}
+
+
+def test_junit_xml_report(tmp_path):
+    path = tmp_path / "report.xml"
+    with JUnitXmlReport(path) as report:
+        for result in _results():
+            report.write(result)
+
+    suite = parse(str(path)).getroot().find("testsuite")
+    success, failure, error = suite.findall("testcase")
+    assert success.get("classname") == "a"
+    assert success.get("name") == "b@1"
+    assert success.get("time") == "0.500"
+    assert not list(success)
+    assert failure.find("failure").get("message") == (
+        "ScoreTooLowReason, NotWhitelistedLicenseReason"
+    )
+    assert "'<'" in failure.find("failure").text
+    assert error.find("error") is not None
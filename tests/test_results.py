@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for the result cache."""
+
+from liferay_inbound_checker.check import (
+    NotWhitelistedLicenseReason,
+    RequestExceptionReason,
+    Result,
+    ScoreTooLowReason,
+    Whitelist,
+    evaluate,
+)
+from liferay_inbound_checker.clearlydefined import ClearlyDefinedDefinitions
+from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.results import ResultCache, policy_digest
+
+
+def _result(dependency, success, reasons):
+    result = Result(dependency)
+    result.success = success
+    result.reasons = reasons
+    return result
+
+
+def test_result_cache_simple(tmp_path):
+    dependency = Dependency("a", "b", "c")
+    result = _result(
+        dependency,
+        False,
+        [ScoreTooLowReason(50), NotWhitelistedLicenseReason("GPL-3.0")],
+    )
+    with ResultCache(tmp_path) as cache:
+        assert cache.get(dependency, "policy") is None
+        cache.set(result, "policy")
+
+    with ResultCache(tmp_path) as cache:
+        assert cache.get(dependency, "other policy") is None
+        cached = cache.get(dependency, "policy")
+        assert cached.cached
+        assert not cached.success
+        assert [str(reason) for reason in cached.reasons] == [
+            str(reason) for reason in result.reasons
+        ]
+
+
+def test_result_cache_skips_request_failures(tmp_path):
+    dependency = Dependency("a", "b", "c")
+    result = _result(
+        dependency, False, [RequestExceptionReason("url", "error")]
+    )
+    with ResultCache(tmp_path) as cache:
+        cache.set(result, "policy")
+        assert cache.get(dependency, "policy") is None
+        assert not len(cache)
+
+
+def test_result_cache_skips_empty_definitions(tmp_path):
+    dependency = Dependency("a", "b", "c")
+    result = evaluate(
+        Result(dependency),
+        ClearlyDefinedDefinitions(
+            {"licensed": {}, "scores": {"effective": 0}}
+        ),
+    )
+    with ResultCache(tmp_path) as cache:
+        cache.set(result, "policy")
+        assert cache.get(dependency, "policy") is None
+        assert not len(cache)
+
+
+def test_result_cache_expired(tmp_path):
+    dependency = Dependency("a", "b", "c")
+    with ResultCache(tmp_path, ttl=-1) as cache:
+        cache.set(_result(dependency, True, []), "policy")
+        assert cache.get(dependency, "policy") is None
+
+
+def test_policy_digest():
+    entry = {"name": "a/b", "version": "c", "comment": "N/A"}
+    assert policy_digest(Whitelist()) == policy_digest(Whitelist())
+    assert policy_digest(Whitelist([entry])) == policy_digest(
+        Whitelist([dict(entry, comment="Changed")])
+    )
+    assert policy_digest(Whitelist([entry])) != policy_digest(Whitelist())
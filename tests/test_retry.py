@@ -0,0 +1,61 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for rate limiting and retrying."""
+
+from email.utils import formatdate
+
+import pytest
+
+from liferay_inbound_checker.retry import RateLimiter, RetryPolicy
+
+
+def test_should_retry():
+    policy = RetryPolicy(retries=2)
+    assert policy.should_retry(0)
+    assert policy.should_retry(0, 429)
+    assert policy.should_retry(1, 503)
+    assert not policy.should_retry(0, 404)
+    assert not policy.should_retry(2, 503)
+
+
+def test_delay_backoff():
+    policy = RetryPolicy(backoff=1, max_backoff=5)
+    for attempt in range(10):
+        assert 0 <= policy.delay(attempt) <= min(2 ** attempt, 5)
+
+
+def test_delay_retry_after_seconds():
+    assert RetryPolicy().delay(0, "7") == 7
+
+
+def test_delay_retry_after_date(mocker):
+    mocker.patch("time.time", return_value=1000000000)
+    retry_after = formatdate(1000000030, usegmt=True)
+    assert RetryPolicy().delay(0, retry_after) == pytest.approx(30)
+
+
+def test_delay_retry_after_capped():
+    assert RetryPolicy(max_backoff=10).delay(0, "3600") == 10
+
+
+def test_rate_limiter_unlimited():
+    limiter = RateLimiter()
+    assert all(limiter.reserve() == 0 for _ in range(100))
+
+
+def test_rate_limiter_rate(mocker):
+    mocker.patch("time.monotonic", return_value=0)
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1)
+    assert limiter.reserve() == pytest.approx(0.2)
+
+
+def test_rate_limiter_pause(mocker):
+    mocker.patch("time.monotonic", return_value=0)
+    limiter = RateLimiter()
+    limiter.pause(5)
+    assert limiter.reserve() == 5
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for offline snapshots."""
+
+import pytest
+from requests import RequestException
+
+from liferay_inbound_checker.check import MissingFromSnapshotReason, check
+from liferay_inbound_checker.clearlydefined import ClearlyDefinedDefinitions
+from liferay_inbound_checker.dependencies import Dependency
+from liferay_inbound_checker.snapshot import (
+    MissingFromSnapshot,
+    OfflineClient,
+    Snapshot,
+    export_snapshot,
+    write_snapshot,
+)
+
+
+class ClientMock:
+    def __init__(self, definitions):
+        self._definitions = definitions
+
+    def bulk_definitions(self, dependencies, chunk_size=None):
+        return {
+            dependency: ClearlyDefinedDefinitions(self._definitions)
+            for dependency in dependencies
+            if dependency.version == "bulk"
+        }
+
+    def definitions(self, dependency):
+        if dependency.version == "missing":
+            raise RequestException()
+        return self._definitions
+
+
+def test_snapshot_simple(tmp_path, clearlydefined_dict):
+    dependency = Dependency("a", "b", "c")
+    write_snapshot(tmp_path / "snapshot", {dependency: clearlydefined_dict})
+
+    with Snapshot(tmp_path / "snapshot") as snapshot:
+        assert len(snapshot) == 1
+        assert snapshot.get(dependency) == clearlydefined_dict
+        assert snapshot.get(Dependency("d", "e", "f")) is None
+
+
+def test_offline_client(tmp_path, clearlydefined_dict):
+    dependency = Dependency("a", "b", "c")
+    other = Dependency("d", "e", "f")
+    write_snapshot(tmp_path / "snapshot", {dependency: clearlydefined_dict})
+
+    with OfflineClient(Snapshot(tmp_path / "snapshot")) as client:
+        assert client.definitions(dependency) == clearlydefined_dict
+        with pytest.raises(MissingFromSnapshot):
+            client.definitions(other)
+        assert set(client.bulk_definitions([dependency, other])) == {
+            dependency
+        }
+        assert [
+            item.definitions is not None
+            for chunk in client.bulk_chunks([dependency, other])
+            for item in chunk
+        ] == [True, False]
+
+        result = check(other, client=client)
+        assert not result.success
+        assert isinstance(result.reasons[0], MissingFromSnapshotReason)
+        assert "export-snapshot" in str(result.reasons[0])
+
+
+def test_export_snapshot(tmp_path, clearlydefined_dict):
+    dependencies = [
+        Dependency("a", "b", "bulk"),
+        Dependency("a", "b", "single"),
+        Dependency("a", "b", "missing"),
+    ]
+
+    missing = export_snapshot(
+        tmp_path / "snapshot", dependencies, ClientMock(clearlydefined_dict)
+    )
+    assert missing == [Dependency("a", "b", "missing")]
+    with Snapshot(tmp_path / "snapshot") as snapshot:
+        assert len(snapshot) == 2
@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: © 2020 Liferay, Inc. <https://liferay.com>
+#
+# SPDX-License-Identifier: LGPL-2.1-or-later
+
+"""Tests for Maven versions and version ranges."""
+
+import pytest
+
+from liferay_inbound_checker.versions import (
+    MavenVersion,
+    is_version_range,
+    parse_version_range,
+)
+
+
+def test_maven_version_order():
+    versions = [
+        "1.0-alpha-1",
+        "1.0-beta",
+        "1.0-rc1",
+        "1.0-SNAPSHOT",
+        "1.0",
+        "1.0-sp",
+        "1.0.1",
+        "1.2",
+        "1.10",
+        "2.0.0.LIFERAY-PATCHED-1",
+    ]
+    parsed = [MavenVersion(version) for version in versions]
+    assert sorted(reversed(parsed)) == parsed
+
+
+def test_maven_version_equal():
+    assert MavenVersion("1") == MavenVersion("1.0.0")
+    assert MavenVersion("5.2.2.RELEASE") == MavenVersion("5.2.2")
+    assert MavenVersion("1.0-ga") == MavenVersion("1.0")
+    assert hash(MavenVersion("1")) == hash(MavenVersion("1.0"))
+
+
+def test_is_version_range():
+    assert is_version_range("[1.0,2.0)")
+    assert is_version_range("(,1.0]")
+    assert not is_version_range("1.0")
+
+
+@pytest.mark.parametrize(
+    "spec,inside,outside",
+    [
+        ("[1.0,2.0)", ["1.0", "1.5", "1.99"], ["0.9", "2.0", "2.1"]),
+        ("(1.0,2.0]", ["1.1", "2.0"], ["1.0", "2.1"]),
+        ("[1.5]", ["1.5", "1.5.0"], ["1.4", "1.6"]),
+        ("[1.0,)", ["1.0", "100"], ["0.9"]),
+        ("(,1.0],[1.2,)", ["0.1", "1.0", "1.2", "3"], ["1.1"]),
+    ],
+)
+def test_parse_version_range(spec, inside, outside):
+    restrictions = parse_version_range(spec)
+    for version in inside:
+        assert any(
+            MavenVersion(version) in restriction
+            for restriction in restrictions
+        )
+    for version in outside:
+        assert not any(
+            MavenVersion(version) in restriction
+            for restriction in restrictions
+        )
+
+
+@pytest.mark.parametrize(
+    "spec", ["[1.0,2.0", "1.0,2.0)", "(1.0)", "[]", "[1.0,2.0)x", ""]
+)
+def test_parse_version_range_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_version_range(spec)
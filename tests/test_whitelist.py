@@ -10,7 +10,12 @@ from io import StringIO
 import pytest
 from requests import RequestException
 
-from liferay_inbound_checker.check import check, is_whitelisted, load_whitelist
+from liferay_inbound_checker.check import (
+    Whitelist,
+    check,
+    is_whitelisted,
+    load_whitelist,
+)
 from liferay_inbound_checker.dependencies import Dependency
 
 
@@ -72,6 +77,95 @@ def test_check_with_whitelist(mocker, simple_whitelist):
     assert result.success
 
 
-def test_load_whitelist(mocker, simple_whitelist_yaml, simple_whitelist):
+def test_load_whitelist(mocker, simple_whitelist_yaml):
     mocker.patch("builtins.open", return_value=StringIO(simple_whitelist_yaml))
-    assert load_whitelist("does-not-matter") == simple_whitelist
+    whitelist = load_whitelist("does-not-matter")
+    assert len(whitelist) == 1
+    assert not whitelist.errors
+    assert (
+        Dependency("org.springframework", "spring-context", "5.2.2.RELEASE")
+        in whitelist
+    )
+
+
+def test_load_whitelist_malformed(mocker):
+    yaml = cleandoc(
+        """
+        - name: foo/bar
+          version: "1.0"
+        - name: foo/bar
+          version: 1.0
+        - name: no-slash
+          version: "1.0"
+        - not_a_name: foo
+        - just a string
+        """
+    )
+    mocker.patch("builtins.open", return_value=StringIO(yaml))
+    whitelist = load_whitelist("does-not-matter")
+    assert len(whitelist) == 1
+    assert len(whitelist.errors) == 4
+
+
+def test_load_whitelist_empty(mocker):
+    mocker.patch("builtins.open", return_value=StringIO(""))
+    whitelist = load_whitelist("does-not-matter")
+    assert not len(whitelist)
+    assert not whitelist.errors
+
+
+def test_whitelist_index(simple_whitelist):
+    whitelist = Whitelist(simple_whitelist)
+    dependency = Dependency(
+        "org.springframework", "spring-context", "5.2.2.RELEASE"
+    )
+    assert dependency in whitelist
+    assert is_whitelisted(dependency, whitelist)
+    assert Dependency("a", "b", "c") not in whitelist
+
+
+def test_whitelist_version_range():
+    whitelist = Whitelist(
+        [
+            {"name": "org.springframework/spring-context", "version": "[5,6)"},
+            {"name": "org.springframework/spring-context", "version": "[7,)"},
+            {"name": "com.example/anything", "version": "*"},
+        ]
+    )
+    assert len(whitelist) == 3
+    for version in ["5.0", "5.2.2.RELEASE", "7.1"]:
+        assert (
+            Dependency("org.springframework", "spring-context", version)
+            in whitelist
+        )
+    for version in ["4.3.9.RELEASE", "6.0", "6.5"]:
+        assert (
+            Dependency("org.springframework", "spring-context", version)
+            not in whitelist
+        )
+    assert Dependency("com.example", "anything", "0.0.1") in whitelist
+    assert Dependency("com.example", "other", "0.0.1") not in whitelist
+
+
+def test_whitelist_glob():
+    whitelist = Whitelist(
+        [
+            {"name": "org.springframework/spring-*", "version": "[5,6)"},
+            {"name": "com.liferay.*/*", "version": "1.0"},
+        ]
+    )
+    assert Dependency("org.springframework", "spring-core", "5.1") in whitelist
+    assert (
+        Dependency("org.springframework", "spring-core", "6.1")
+        not in whitelist
+    )
+    assert Dependency("org.springframework", "other", "5.1") not in whitelist
+    assert Dependency("com.liferay.portal", "kernel", "1.0") in whitelist
+    assert Dependency("com.liferay.portal", "kernel", "1.1") not in whitelist
+    assert Dependency("com.liferay", "kernel", "1.0") not in whitelist
+
+
+def test_whitelist_invalid_range():
+    whitelist = Whitelist([{"name": "foo/bar", "version": "[1.0,2.0"}])
+    assert not len(whitelist)
+    assert len(whitelist.errors) == 1